@@ -0,0 +1,110 @@
+"""Download-side helpers for the SportVU .7z archives.
+
+Archives can come from GitHub, from a local mirror directory or from any HTTP server holding the same files
+(e.g. `python -m http.server` in the mirror directory); see mirror_url. Downloaded archives are verified
+against the manifest size and sha256 and decompressed with py7zr in a process pool that runs ahead of
+example generation, so extracting the next games overlaps with reading the current one.
+"""
+
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+MIRROR_ENV = "NBA_TRACKING_MIRROR"
+PBP_FILENAME = "2015-16_pbp.csv"
+
+_DONE_MARKER = ".complete"
+_7Z_SIGNATURE = b"7z\xbc\xaf\x27\x1c"
+
+
+def is_archive(path):
+    """Returns whether `path` is a 7z archive; downloads are cached under hashed names, so the signature is checked."""
+    with open(path, "rb") as fp:
+        return fp.read(len(_7Z_SIGNATURE)) == _7Z_SIGNATURE
+
+
+def mirror_url(mirror, name):
+    """Returns the location of `name` in a mirror given as a directory or an http(s) URL."""
+    if "://" in mirror:
+        return mirror.rstrip("/") + "/" + name
+    return os.path.join(os.path.abspath(os.path.expanduser(mirror)), name)
+
+
+def sha256sum(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_archive(path, size=None, sha256=None):
+    """Raises ValueError when the file at `path` does not have the expected size or sha256 (None skips the check)."""
+    if size is not None and os.path.getsize(path) != size:
+        raise ValueError(f"{path} is {os.path.getsize(path)} bytes, expected {size}")
+    if sha256 is not None and sha256sum(path) != sha256:
+        raise ValueError(f"{path} does not match its sha256 {sha256}")
+
+
+def extract_archive(path, size=None, sha256=None, out_root=None):
+    """
+    This function takes a downloaded .7z game archive and its expected size / sha256.
+    It verifies and extracts it (once; later calls reuse the extracted file) into its own directory under `out_root`,
+    or next to the archive when out_root is None, and returns the path of the game's JSON file.
+    """
+    import py7zr
+
+    if out_root is None:
+        out_dir = path + ".extracted"
+    else:
+        # archives from different mirrors can share a name
+        key = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+        out_dir = os.path.join(out_root, f"{key}-{os.path.basename(path)}")
+    if not os.path.exists(os.path.join(out_dir, _DONE_MARKER)):
+        verify_archive(path, size, sha256)
+        with py7zr.SevenZipFile(path, mode="r") as archive:
+            archive.extractall(path=out_dir)
+        open(os.path.join(out_dir, _DONE_MARKER), "w").close()
+    names = sorted(name for name in os.listdir(out_dir) if name.endswith(".json"))
+    if not names:
+        raise ValueError(f"{path} holds no .json game file")
+    return os.path.join(out_dir, names[0])
+
+
+def shard_extract_workers(num_proc=None):
+    """Returns the extraction processes for each of `num_proc` concurrent consumers, so that together they use one per core."""
+    return max(1, (os.cpu_count() or 1) // (num_proc or 1))
+
+
+def extract_ahead(archives, max_workers=None, out_root=None):
+    """
+    This function takes a list of (path, size, sha256) archive tuples and yields the extracted JSON path of each, in order
+    (see extract_archive for `out_root`).
+    Up to `max_workers` archives (default: CPU count) are verified and extracted in a process pool ahead of the one
+    being consumed. Paths that are not 7z archives (already extracted game files) are yielded unchanged.
+    """
+    archives = [(path, size, sha256, is_archive(path)) for path, size, sha256 in archives]
+    if not any(archive for _, _, _, archive in archives):
+        yield from (path for path, _, _, _ in archives)
+        return
+
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(archives)))
+    with ProcessPoolExecutor(max_workers) as pool:
+        pending = deque()
+        remaining = iter(archives)
+
+        def submit():
+            for path, size, sha256, archive in remaining:
+                if archive:
+                    pending.append(pool.submit(extract_archive, path, size, sha256, out_root))
+                else:
+                    pending.append(path)
+                return
+
+        for _ in range(max_workers):
+            submit()
+        while pending:
+            item = pending.popleft()
+            submit()
+            yield item if isinstance(item, str) else item.result()
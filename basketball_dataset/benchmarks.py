@@ -0,0 +1,244 @@
+"""Benchmarks for the nba_tracking_data_15_16 build stages.
+
+    python -m basketball_dataset.benchmarks pbp-join --pbp /path/to/2015-16_pbp.csv
+    python -m basketball_dataset.benchmarks suite --games 3 --events 40 --frames 150 [--json]
+
+The suite runs offline on synthetic games (see synthetic.py).
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from .play_by_play import PbpIndex, read_pbp
+
+# games per builder config; 'full' uses every game present in the PBP table
+CONFIG_GAMES = {"tiny": 5, "small": 25, "medium": 100, "full": None}
+
+
+def _config_keys(pbp, config):
+    game_ids = sorted(pbp.GAME_ID.unique().tolist())
+    random.seed(9)
+    samples = CONFIG_GAMES[config] or len(game_ids)
+    games = set(random.sample(game_ids, min(samples, len(game_ids))))
+    rows = pbp[pbp.GAME_ID.isin(games)]
+    return list(zip(rows.GAME_ID.tolist(), rows.EVENTNUM.tolist()))
+
+
+def bench_pbp_join(pbp_path, configs=("medium", "full"), mask_samples=200):
+    """
+    This function times the per-event PBP join for each config.
+    The indexed lookup is timed over every event of the config; the old boolean-mask join is timed over
+    `mask_samples` events and reported per event, since running it over a full config takes hours.
+    It returns a list of result dicts, one per config.
+    """
+    start = time.perf_counter()
+    pbp = read_pbp(pbp_path)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = PbpIndex(pbp)
+    index_seconds = time.perf_counter() - start
+
+    results = []
+    for config in configs:
+        keys = _config_keys(pbp, config)
+
+        start = time.perf_counter()
+        for game_id, event_num in keys:
+            index.lookup(game_id, event_num)
+        indexed = (time.perf_counter() - start) / len(keys)
+
+        sample = random.sample(keys, min(mask_samples, len(keys)))
+        start = time.perf_counter()
+        for game_id, event_num in sample:
+            event_row = pbp.loc[(pbp.GAME_ID == int(game_id)) & (pbp.EVENTNUM == int(event_num))]
+            len(event_row)
+        masked = (time.perf_counter() - start) / len(sample)
+
+        results.append({
+            "config": config,
+            "events": len(keys),
+            "pbp_rows": len(pbp),
+            "load_seconds": load_seconds,
+            "index_seconds": index_seconds,
+            "indexed_us_per_event": indexed * 1e6,
+            "mask_us_per_event": masked * 1e6,
+            "speedup": masked / indexed,
+        })
+    return results
+
+
+def _measure(stage, run, setup=None, trace_memory=True):
+    """
+    Times run(*setup()), which returns the (events, frames) it processed (frames is 0 for stages without frames).
+    With trace_memory the stage runs a second time under tracemalloc to record its peak allocation,
+    so tracing does not slow down the timed run.
+    """
+    args = setup() if setup else ()
+    start = time.perf_counter()
+    events, frames = run(*args)
+    seconds = time.perf_counter() - start
+
+    peak_mb = None
+    if trace_memory:
+        args = setup() if setup else ()
+        tracemalloc.start()
+        try:
+            run(*args)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "stage": stage,
+        "events": events,
+        "frames": frames,
+        "seconds": seconds,
+        "events_per_second": events / seconds if seconds else None,
+        "frames_per_second": frames / seconds if seconds and frames else None,
+        "peak_mb": peak_mb,
+    }
+
+
+def bench_suite(games=3, events=40, frames=150, overlap=0.5, out_dir=None, trace_memory=True):
+    """
+    This function writes synthetic games (see synthetic.write_games) and times each stage on them separately:
+    JSON parse, PBP join, example generation, filter_candidate_events (serially and with num_proc=2), kinematics,
+    role detection and export.
+    It returns a list of result dicts, one per stage, followed by one for the peak RSS of the whole process.
+    """
+    from .dataset_operations import compute_kinematics, event_xy, filter_candidate_events, locate_roles
+    from .nba_tracking_data_15_16 import NbaTracking
+    from .sportvu_json import SportVuGame
+    from .synthetic import write_games
+    from .turnover_table import read_turnovers, write_turnovers
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_dir = out_dir or os.path.join(tmp_dir, "games")
+        paths, pbp_path = write_games(out_dir, games, events, frames, overlap)
+        results = []
+
+        def parse():
+            n_events = n_frames = 0
+            for path in paths:
+                with SportVuGame(path) as game:
+                    for event in game.events():
+                        n_events += 1
+                        n_frames += len(event["moments"])
+            return n_events, n_frames
+        results.append(_measure("json_parse", parse, trace_memory=trace_memory))
+
+        def pbp_join():
+            pbp = read_pbp(pbp_path)
+            index = PbpIndex(pbp)
+            keys = list(zip(pbp.GAME_ID.tolist(), pbp.EVENTNUM.tolist()))
+            for game_id, event_num in keys:
+                index.lookup(game_id, event_num)
+            return len(keys), 0
+        results.append(_measure("pbp_join", pbp_join, trace_memory=trace_memory))
+
+        builder = NbaTracking(config_name="full", cache_dir=os.path.join(tmp_dir, "hf"))
+        examples = []
+
+        def generate():
+            examples[:] = [example for _, example in builder._generate_examples(paths, pbp_path, "train")]
+            return len(examples), sum(len(example["moments"]) for example in examples)
+        results.append(_measure("example_generation", generate, trace_memory=trace_memory))
+
+        filtered = []
+
+        def filter_events(events):
+            filtered[:] = filter_candidate_events(events)
+            return len(events), sum(len(event["moments"]) for event in events)
+        results.append(_measure("filter_candidate_events", filter_events, lambda: (copy.deepcopy(examples),), trace_memory))
+
+        def filter_events_pool(events):
+            # the default call without stats, as EventCache makes it
+            n_filtered = sum(1 for _ in filter_candidate_events(events, num_proc=2))
+            if n_filtered != len(filtered):
+                raise AssertionError(f"num_proc=2 kept {n_filtered} events, serially {len(filtered)}")
+            return len(events), sum(len(event["moments"]) for event in events)
+        results.append(_measure("filter_candidate_events_num_proc", filter_events_pool, lambda: (copy.deepcopy(examples),), trace_memory))
+
+        def event_arrays():
+            return ([event_xy(event) for event in filtered],)
+
+        def kinematics(arrays):
+            for xy, _, _ in arrays:
+                compute_kinematics(xy)
+            return len(arrays), sum(len(xy) for xy, _, _ in arrays)
+        results.append(_measure("kinematics", kinematics, event_arrays, trace_memory))
+
+        def roles(arrays):
+            for (xy, player_ids, team_ids), event in zip(arrays, filtered):
+                locate_roles(xy, player_ids, team_ids == event["event_info"]["possession_team_id"])
+            return len(arrays), sum(len(xy) for xy, _, _ in arrays)
+        results.append(_measure("role_detection", roles, event_arrays, trace_memory))
+
+        def export():
+            path = os.path.join(tmp_dir, "turnovers.parquet")
+            n_rows = write_turnovers(filtered, path)
+            read_turnovers(path)
+            return n_rows, 0
+        results.append(_measure("export", export, trace_memory=trace_memory))
+
+    # ru_maxrss is in kilobytes on Linux
+    results.append({"stage": "process", "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024})
+    return results
+
+
+def _format_rate(value):
+    return "-" if value is None else f"{value:,.0f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark nba_tracking_data_15_16 build stages.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    pbp_join = subparsers.add_parser("pbp-join", help="per-event PBP join cost")
+    pbp_join.add_argument("--pbp", required=True, help="path to the season PBP CSV")
+    pbp_join.add_argument("--configs", nargs="+", default=["medium", "full"], choices=sorted(CONFIG_GAMES))
+    pbp_join.add_argument("--mask-samples", type=int, default=200)
+
+    suite = subparsers.add_parser("suite", help="per-stage throughput on synthetic games")
+    suite.add_argument("--games", type=int, default=3)
+    suite.add_argument("--events", type=int, default=40)
+    suite.add_argument("--frames", type=int, default=150)
+    suite.add_argument("--overlap", type=float, default=0.5)
+    suite.add_argument("--no-memory", dest="trace_memory", action="store_false", help="skip the tracemalloc runs")
+    suite.add_argument("--json", action="store_true", help="print the results as JSON")
+
+    args = parser.parse_args(argv)
+    if args.benchmark == "pbp-join":
+        for result in bench_pbp_join(args.pbp, args.configs, args.mask_samples):
+            print(
+                f"{result['config']:>6}: {result['events']} events over {result['pbp_rows']} PBP rows | "
+                f"indexed {result['indexed_us_per_event']:.2f} us/event, "
+                f"mask {result['mask_us_per_event']:.0f} us/event ({result['speedup']:.0f}x) | "
+                f"load {result['load_seconds']:.2f}s, index {result['index_seconds']:.2f}s"
+            )
+    elif args.benchmark == "suite":
+        results = bench_suite(args.games, args.events, args.frames, args.overlap, trace_memory=args.trace_memory)
+        if args.json:
+            print(json.dumps(results, indent=2))
+            return
+        for result in results:
+            if result["stage"] == "process":
+                print(f"peak RSS {result['peak_rss_mb']:.0f} MB")
+                continue
+            peak = "" if result["peak_mb"] is None else f", peak {result['peak_mb']:.1f} MB"
+            print(
+                f"{result['stage']:>24}: {result['seconds']:.3f}s | {_format_rate(result['events_per_second'])} events/s, "
+                f"{_format_rate(result['frames_per_second'])} frames/s{peak}"
+            )
+
+
+if __name__ == "__main__":
+    main()
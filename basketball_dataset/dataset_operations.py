@@ -1,16 +1,174 @@
+from contextlib import nullcontext
 from math import atan2, degrees
 import numpy as np
+
+from .quantization import dequantize
+# defined next to the build-time resampling, which the dataset script imports
+from .resampling import compute_kinematics
+
+def _affine(matrix, offset):
+  """
+  This function takes a 2x2 matrix and an offset and returns them as a 3x3 homogeneous transform.
+  """
+  transform = np.eye(3)
+  transform[:2, :2] = matrix
+  transform[:2, 2] = offset
+  return transform
+
+# rotation applied to every event: (x, y) -> (50 - y, x), basket of the attacking team at y = 89.25 when attacking right
+_ROTATE_RIGHT = _affine([[0, -1], [1, 0]], [50, 0])
+# rotation applied to 'left' events: (x, y) -> (y, 94 - x)
+_ROTATE_LEFT = _affine([[0, 1], [-1, 0]], [0, 94])
+# second pass applied to 'left' events: (x, y) -> (50 - x, 94 - y)
+_FLIP = _affine([[-1, 0], [0, -1]], [50, 94])
+
+# precomputed per-direction transforms; note that the composed 'left' transform equals the 'right' one
+COURT_TRANSFORMS = {
+  'left': _FLIP @ _ROTATE_LEFT,
+  'right': _ROTATE_RIGHT,
+}
+
+def normalize_court(event, direction):
+  """
+  This function takes an event and its direction of play ('left' or 'right') and rotates all ball and player
+  coordinates of the event with one batched affine transform; array-backed events get new arrays, never written in place.
+  It works on array-backed events (a 'positions' array of shape frames x 11 x 3) as well as on the dict 'moments' format.
+  Directions of motion stored at build time (see resampling) are rotated with them.
+  """
+  transform = COURT_TRANSFORMS[direction]
+  matrix, offset = transform[:2, :2], transform[:2, 2]
+
+  if 'positions' in event:
+    # always a new array: the event's positions can be a view shared with other events (tracking_arrays.GameEvents)
+    positions = np.array(event['positions'], dtype=np.float32)
+    positions[..., :2] = positions[..., :2] @ matrix.T.astype(positions.dtype) + offset.astype(positions.dtype)
+    event['positions'] = positions
+    if 'direction' in event:
+      event['direction'] = np.asarray(event['direction'], dtype=np.float32) @ matrix.T.astype(np.float32)
+    return event
+
+  # dict format: a single pass applying the same transform
+  (a, b), (c, d) = matrix.tolist()
+  e, f = offset.tolist()
+  for moment in event['moments']:
+    for coordinate in [moment['ball_coordinates'], *moment['player_coordinates']]:
+      x, y = coordinate['x'], coordinate['y']
+      coordinate['x'] = a * x + b * y + e
+      coordinate['y'] = c * x + d * y + f
+      if 'dir_x' in coordinate:
+        dx, dy = coordinate['dir_x'], coordinate['dir_y']
+        coordinate['dir_x'] = a * dx + b * dy
+        coordinate['dir_y'] = c * dx + d * dy
+  return event
+
+
+def _moments_xy(moments):
+  """
+  This function takes dict-format moments and aligns ball and players by id across frames.
+  It returns (xy, player_ids, team_ids, frame_index, slot_index) where xy is frames x (1 + players) x 2 with the ball in slot 0,
+  and frame_index / slot_index give the position in xy of every player dict, in moment order.
+  """
+  ball = np.array([[moment['ball_coordinates']['x'], moment['ball_coordinates']['y']] for moment in moments], dtype=np.float64).reshape(-1, 2)
+  players = [(frame, player['playerid'], player['teamid'], player['x'], player['y']) for frame, moment in enumerate(moments) for player in moment['player_coordinates']]
+  frame_index = np.array([player[0] for player in players], dtype=np.int64)
+  ids = np.array([player[1] for player in players], dtype=np.int64)
+  player_ids, first, columns = np.unique(ids, return_index=True, return_inverse=True)
+  team_ids = np.array([player[2] for player in players], dtype=np.int64)[first]
+
+  xy = np.full((len(moments), 1 + len(player_ids), 2), np.nan)
+  xy[:, 0] = ball
+  slot_index = columns.reshape(-1) + 1
+  xy[frame_index, slot_index] = np.array([player[3:] for player in players], dtype=np.float64).reshape(-1, 2)
+  return xy, player_ids, team_ids, frame_index, slot_index
+
+def event_xy(event):
+  """
+  This function takes an event in either format and returns (xy, player_ids, team_ids):
+  court x/y of shape frames x (1 + players) x 2 with the ball in slot 0, and the id and team of each player slot.
+  """
+  if 'positions' in event:
+    player_table = np.asarray(event['player_table'])
+    return np.asarray(event['positions'])[..., :2], player_table[:, 0], player_table[:, 1]
+  xy, player_ids, team_ids, _, _ = _moments_xy(event['moments'])
+  return xy, player_ids, team_ids
+
+def event_clock(event):
+  """
+  This function takes an event in either format and returns its frames x 3 array of quarter, game_clock, shot_clock.
+  """
+  if 'clock' in event:
+    return np.asarray(event['clock'], dtype=np.float64)
+  return np.array([[moment['quarter'], moment['game_clock'], moment['shot_clock']] for moment in event['moments']], dtype=np.float64).reshape(-1, 3)
+
+def add_kinematics(event, fps=25, smooth_window=None):
+  """
+  This function takes an event and adds speed and direction for the ball and every player in every frame.
+  Array-backed events (with 'positions') get an event['kinematics'] dict of frames x 11 arrays (see compute_kinematics).
+  Dict-format events get 'speed', 'dir_x' and 'dir_y' written into each ball and player dict, as before; NaN when there is no prior frame.
+  Events built with resampling already carry speed and direction computed at the full frame rate, which are kept
+  (array events get event['kinematics'] with just 'speed' and 'direction').
+  Operates in-place on the event dict.
+  """
+  if has_build_kinematics(event):
+    if 'positions' in event:
+      event['kinematics'] = {'speed': np.asarray(event['speed'], dtype=np.float64), 'direction': np.asarray(event['direction'], dtype=np.float64)}
+    return event
+  if 'positions' in event:
+    event['kinematics'] = compute_kinematics(np.asarray(event['positions'])[..., :2], fps=fps, smooth_window=smooth_window)
+    return event
+
+  moments = event['moments']
+  if len(moments) == 0:
+    return event
+  xy, _, _, frame_index, slot_index = _moments_xy(moments)
+  kinematics = compute_kinematics(xy, fps=fps, smooth_window=smooth_window)
+  speed = kinematics['speed']
+  direction = kinematics['direction']
+
+  for moment, ball_speed, (dir_x, dir_y) in zip(moments, speed[:, 0].tolist(), direction[:, 0].tolist()):
+    moment['ball_coordinates']['speed'] = ball_speed
+    moment['ball_coordinates']['dir_x'] = dir_x
+    moment['ball_coordinates']['dir_y'] = dir_y
+
+  player_speed = speed[frame_index, slot_index].tolist()
+  player_direction = direction[frame_index, slot_index].tolist()
+  players = (player for moment in moments for player in moment['player_coordinates'])
+  for player, player_speed, (dir_x, dir_y) in zip(players, player_speed, player_direction):
+    player['speed'] = player_speed
+    player['dir_x'] = dir_x
+    player['dir_y'] = dir_y
+  return event
+
+# (x_min, x_max, y_min, y_max) in raw SportVU court coordinates, before normalize_court
+LEFT_BASKET_BOX = (3.5, 6, 24, 26)
+RIGHT_BASKET_BOX = (88, 90.5, 24, 26)
+
+def in_box(x, y, box):
+  """
+  This function takes x / y coordinates (scalars or arrays) and an (x_min, x_max, y_min, y_max) box and returns if they are inside it.
+  """
+  x_min, x_max, y_min, y_max = box
+  return (x_min <= x) & (x <= x_max) & (y_min <= y) & (y <= y_max)
+
+def has_build_kinematics(event):
+  """
+  This function takes an event in either format and returns if it carries speed and direction from the build (see resampling).
+  """
+  if 'positions' in event:
+    return 'speed' in event
+  return len(event['moments']) > 0 and 'speed' in event['moments'][0]['ball_coordinates']
+
 def left_basket(moment):
   """
   This function takes a moment in the game and returns if the ball is in the left basket.
   """
-  return (3.5 <= moment['ball_coordinates']['x'] <= 6) and (24 <= moment['ball_coordinates']['y'] <= 26)
+  return bool(in_box(moment['ball_coordinates']['x'], moment['ball_coordinates']['y'], LEFT_BASKET_BOX))
 
 def right_basket(moment):
   """
   This function takes a moment in the game and returns if the ball is in the right basket.
   """
-  return (88 <= moment['ball_coordinates']['x'] <= 90.5) and (24 <= moment['ball_coordinates']['y'] <= 26)
+  return bool(in_box(moment['ball_coordinates']['x'], moment['ball_coordinates']['y'], RIGHT_BASKET_BOX))
 
 # using find_actions() criteria from https://etd.ohiolink.edu/acprod/odb_etd/ws/send_file/send?accession=csu14943636475232&disposition=inline
 def locate_ballhandler(moment, poss_team_id):
@@ -141,278 +299,472 @@ def find_screen(moment, poss_team_id, handler_id = None, defender_id = None, scr
       return True, handler_id, defender_id, screener_id
   return False, handler_id, defender_id, screener_id
 
-def filter_candidate_events(events):
+# thresholds of the single-moment locate_* functions above, in ft
+BASKET_COORDS = (25, 89.25)
+HANDLER_MAX_DISTANCE = 5
+DEFENDER_MAX_DISTANCE = 12
+SCREENER_MAX_DISTANCE = 5
+SCREENER_BASKET_EXCLUSION = 10
+SCREEN_DEFENDER_MAX_DISTANCE = 10
+
+def locate_roles(xy, player_ids, offense):
   """
-  This function takes in a generator of events and outputs a generator that is filtered to only include potential PNR/PNP actions.
-  It also modifies the events to be worked with in a uniform format by rotating the coordinates depending on the direction of play.
-  There is a bit of hard-coding in the directionality section, which is necessary due to mistimed events in the raw data.
+  This function is the batched version of locate_ballhandler, locate_defender and locate_screener.
+  It takes court positions xy (frames x 11 x 2, ball in slot 0, NaN where absent), the player id of each player slot
+  and an offense mask (True for players of the team in possession). Ids and mask are either per slot (players,)
+  or per frame (frames x players), so frames of many events can be stacked into one call.
+  It returns a dict of per-frame 'handler', 'defender' and 'screener' ids (-1 where there is none), using the same thresholds.
+  """
+  xy = np.asarray(xy, dtype=np.float64)
+  ball, players = xy[:, 0], xy[:, 1:]
+  n_frames, n_players = players.shape[:2]
+  frames = np.arange(n_frames)
+  player_ids = np.broadcast_to(player_ids, (n_frames, n_players))
+  present = ~np.isnan(players).any(axis=-1)
+  offense = np.broadcast_to(np.asarray(offense, dtype=bool), (n_frames, n_players)) & present
+  defense = ~np.broadcast_to(np.asarray(offense, dtype=bool), (n_frames, n_players)) & present
+
+  def distance(points, origin):
+    dx, dy = points[..., 0] - origin[..., 0], points[..., 1] - origin[..., 1]
+    return np.sqrt(dx * dx + dy * dy)
+
+  # frames x players distances to the ball, then to the ball-handler
+  ball_distance = distance(players, ball[:, None])
+  ball_distance = np.where(offense & ~np.isnan(ball_distance), ball_distance, np.inf)
+  handler = np.argmin(ball_distance, axis=1)
+  has_handler = ball_distance[frames, handler] <= HANDLER_MAX_DISTANCE
+
+  handler_distance = distance(players, players[frames, handler][:, None])
+  defender_distance = np.where(defense, handler_distance, np.inf)
+  defender = np.argmin(defender_distance, axis=1)
+  has_defender = has_handler & (defender_distance[frames, defender] <= DEFENDER_MAX_DISTANCE)
+
+  teammate_distance = np.where(offense & (np.arange(n_players) != handler[:, None]), handler_distance, np.inf)
+  screener = np.argmin(teammate_distance, axis=1)
+  screener_basket_distance = distance(players[frames, screener], np.asarray(BASKET_COORDS))
+  has_screener = (
+    has_defender
+    & (teammate_distance[frames, screener] <= SCREENER_MAX_DISTANCE)
+    & (screener_basket_distance >= SCREENER_BASKET_EXCLUSION)
+    & (handler_distance[frames, defender] <= SCREEN_DEFENDER_MAX_DISTANCE)
+  )
+
+  return {
+    'handler': np.where(has_handler, player_ids[frames, handler], -1),
+    'defender': np.where(has_defender, player_ids[frames, defender], -1),
+    'screener': np.where(has_screener, player_ids[frames, screener], -1),
+  }
+
+def locate_event_roles(event, poss_team_id=None):
+  """
+  This function takes an event in either format and returns locate_roles for all of its frames,
+  using the event's possession team unless `poss_team_id` is given.
+  """
+  if poss_team_id is None:
+    poss_team_id = event['event_info']['possession_team_id']
+  xy, player_ids, team_ids = event_xy(event)
+  return locate_roles(xy, player_ids, team_ids == poss_team_id)
+
+# a screen has to hold for more than this many distinct game_clock frames
+SCREEN_MIN_FRAMES = 9
+
+def screen_mask(xy, roles):
+  """
+  This function is the batched version of find_screen. It takes court positions (frames x 11 x 2, ball in slot 0)
+  and the output of locate_roles, and returns a boolean per frame: handler, defender and screener all found,
+  ball past half-court and more than 10 ft from the basket.
+  """
+  ball = np.asarray(xy, dtype=np.float64)[:, 0]
+  dx, dy = ball[:, 0] - BASKET_COORDS[0], ball[:, 1] - BASKET_COORDS[1]
+  return (
+    (roles['handler'] != -1) & (roles['defender'] != -1) & (roles['screener'] != -1)
+    & (ball[:, 1] > 47) & (np.sqrt(dx * dx + dy * dy) > 10)
+  )
+
+def find_screen_segments(xy, roles, clock, min_frames=SCREEN_MIN_FRAMES):
+  """
+  This function takes court positions (frames x 11 x 2), per-frame roles (output of locate_roles) and the frames x 3 clock.
+  Frames repeating the previous frame's game_clock are skipped, the remaining frames are run-length encoded on
+  (screen, handler, defender, screener), and every screen run of at least `min_frames` frames is returned as a dict with
+  start_frame / end_frame (frame indices into the event, end exclusive), handler_id, defender_id, screener_id and
+  time_stamps (game_clock at the first and last frame of the segment).
+  """
+  game_clock = np.asarray(clock, dtype=np.float64)[:, 1]
+  if len(game_clock) == 0:
+    return []
+  kept = np.flatnonzero(np.r_[True, game_clock[1:] != game_clock[:-1]])
+
+  keys = np.stack([screen_mask(xy, roles), roles['handler'], roles['defender'], roles['screener']], axis=1)[kept]
+  run_starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)])
+  run_ends = np.r_[run_starts[1:], len(kept)]
+  long_screens = (keys[run_starts, 0] == 1) & (run_ends - run_starts >= min_frames)
+
+  segments = []
+  for start, end in zip(run_starts[long_screens].tolist(), run_ends[long_screens].tolist()):
+    first, last = kept[start], kept[end - 1]
+    segments.append({
+      'start_frame': int(first),
+      'end_frame': int(last) + 1,
+      'handler_id': int(roles['handler'][first]),
+      'defender_id': int(roles['defender'][first]),
+      'screener_id': int(roles['screener'][first]),
+      'time_stamps': [round(float(game_clock[first]), 2), round(float(game_clock[last]), 2)],
+    })
+  return segments
+
+# turnover localization: the handler gains the ball within this distance, loses it beyond the next,
+# and the event frame is the first frame after that where the ball is slower than LOOSE_BALL_MAX_SPEED (ft/s)
+HANDLER_POSSESSION_DISTANCE = 2
+HANDLER_LOST_DISTANCE = 5
+LOOSE_BALL_MAX_SPEED = 3
+# made shot localization: first frame with the ball this close to the rim
+RIM_MADE_SHOT_DISTANCE = 1.5
+
+def event_distance_series(xy, player_ids, player_id):
+  """
+  This function takes court positions (frames x 11 x 2, ball in slot 0), the id of each player slot and a player id.
+  It returns (ball_to_player, ball_to_rim), per-frame distances from the ball to the player and to the rim at BASKET_COORDS.
+  Frames where the player is missing use the player's last known position (NaN before the player is first seen).
+  """
+  xy = np.asarray(xy, dtype=np.float64)
+  ball = xy[:, 0]
+  slots = np.flatnonzero(np.asarray(player_ids) == player_id)
+  if len(slots):
+    player = xy[:, slots[0] + 1]
+    seen = ~np.isnan(player).any(axis=1)
+    last_seen = np.maximum.accumulate(np.where(seen, np.arange(len(player)), 0))
+    player = np.where(seen[last_seen][:, None], player[last_seen], np.nan)
+  else:
+    player = np.full_like(ball, np.nan)
+
+  dx, dy = ball[:, 0] - player[:, 0], ball[:, 1] - player[:, 1]
+  ball_to_player = np.sqrt(dx * dx + dy * dy)
+  dx, dy = ball[:, 0] - BASKET_COORDS[0], ball[:, 1] - BASKET_COORDS[1]
+  return ball_to_player, np.sqrt(dx * dx + dy * dy)
+
+def _first_frame(mask):
+  # first True frame, or the last frame when there is none
+  return int(np.argmax(mask)) if mask.any() else len(mask) - 1
+
+def locate_turnover_frame(ball_to_handler, ball_speed):
+  """
+  This function takes per-frame ball-to-handler distances and ball speeds.
+  It returns the frame where the turnover happens: the first frame with a slow ball after the handler had the ball
+  and then lost it (see HANDLER_POSSESSION_DISTANCE / HANDLER_LOST_DISTANCE / LOOSE_BALL_MAX_SPEED), else the last frame.
+  """
+  # each stage is only checked from the frame after the previous one was reached
+  has_ball = np.cumsum(ball_to_handler < HANDLER_POSSESSION_DISTANCE) > 0
+  lost = np.cumsum(np.r_[False, has_ball[:-1]] & (ball_to_handler > HANDLER_LOST_DISTANCE)) > 0
+  return _first_frame(np.r_[False, lost[:-1]] & (ball_speed < LOOSE_BALL_MAX_SPEED))
+
+def locate_made_shot_frame(ball_to_rim):
+  """
+  This function takes per-frame ball-to-rim distances and returns the first frame within RIM_MADE_SHOT_DISTANCE, else the last frame.
+  """
+  return _first_frame(ball_to_rim < RIM_MADE_SHOT_DISTANCE)
+
+def locate_event_frame(event, fps=25):
+  """
+  This function takes a turnover (type 5) or made shot (type 1) event in either format, with its court already normalized.
+  It returns the index of the frame where the event happens (see locate_turnover_frame / locate_made_shot_frame),
+  or None for other event types and events without moments.
+  """
+  event_type = event['event_info']['type']
+  if event_type not in (1, 5):
+    return None
+  xy, player_ids, _ = event_xy(event)
+  if len(xy) == 0:
+    return None
+  ball_to_handler, ball_to_rim = event_distance_series(xy, player_ids, event['primary_info']['player_id'])
+  if event_type == 1:
+    return locate_made_shot_frame(ball_to_rim)
+  if has_build_kinematics(event):
+    # resampled events are not at `fps`
+    ball_speed = np.array(event['speed'], dtype=np.float64)[:, 0] if 'positions' in event else \
+      np.array([moment['ball_coordinates']['speed'] for moment in event['moments']], dtype=np.float64)
+  else:
+    ball_speed = compute_kinematics(xy[:, :1], fps=fps)['speed'][:, 0]
+  return locate_turnover_frame(ball_to_handler, ball_speed)
+
+def event_moment(event, frame=None):
+  """
+  This function takes an event in either format and a frame index, by default event['event_info']['event_frame'].
+  It returns that frame: the moment dict for dict-format events, and for array events a dict with the frame's
+  quarter, game_clock, shot_clock, positions (11 x 3, ball in slot 0) and the event's player_table.
+  """
+  if frame is None:
+    frame = event['event_info']['event_frame']
+  if 'positions' not in event:
+    return event['moments'][frame]
+  quarter, game_clock, shot_clock = np.asarray(event['clock'])[frame].tolist()
+  return {
+    'quarter': int(quarter),
+    'game_clock': game_clock,
+    'shot_clock': shot_clock,
+    'positions': np.asarray(event['positions'])[frame],
+    'player_table': np.asarray(event['player_table']),
+  }
+
+def is_candidate_event(event):
+  """
+  This function takes an event and returns whether it is a candidate for filter_candidate_events:
+  a turnover (type 5) with a possession team and both descriptions, or a made shot (type 1) with a possession team.
   """
   import math
 
-  filter_events = {1,5} # Going to make this just 5 for turnovers {1,2,5,6}
-  start_counter = 0
-  game_id = events[0]['gameid']
+  info = event['event_info']
+  if info['possession_team_id'] is None or math.isnan(info['possession_team_id']):
+    return False
+  if info['type'] == 5:
+    return info["desc_home"] != "nan" and info["desc_away"] != "nan"
+  return info['type'] == 1
+
+def _event_quarter(event):
+  if 'clock' in event:
+    return int(event['clock'][0][0])
+  return event['moments'][0]['quarter']
+
+def _has_moments(event):
+  return len(event['positions'] if 'positions' in event else event['moments']) > 0
+
+def event_basket_side(event):
+  """
+  This function takes an event in either format, before normalize_court, and returns 'left' or 'right' for the basket
+  the ball is first in (see left_basket / right_basket), or None when it never is.
+  """
+  if 'positions' in event:
+    ball = np.asarray(event['positions'], dtype=np.float64)[:, 0, :2]
+  else:
+    ball = np.array([[moment['ball_coordinates']['x'], moment['ball_coordinates']['y']] for moment in event['moments']], dtype=np.float64).reshape(-1, 2)
+  left = in_box(ball[:, 0], ball[:, 1], LEFT_BASKET_BOX)
+  right = in_box(ball[:, 0], ball[:, 1], RIGHT_BASKET_BOX)
+  hits = np.flatnonzero(left | right)
+  if len(hits) == 0:
+    return None
+  return 'left' if left[hits[0]] else 'right'
+
+_OTHER_SIDE = {'left': 'right', 'right': 'left'}
+
+def _team_key(event):
+  # with_format("numpy") rows hold 0-d arrays, which are not hashable; None for a missing possession team
+  team = event['event_info']['possession_team_id']
+  team = None if team is None else float(np.asarray(team).item())
+  return None if team is None or team != team else team
+
+def _game_key(event):
+  return str(np.asarray(event['gameid']).item())
+
+class DirectionVotes:
+  """
+  Per-game tally used to infer the direction of play of each team.
+  Every candidate event whose ball reaches a basket votes for the basket its possession team attacks; votes from the
+  second half and overtime (quarter 3 and later) count for the other basket, since teams switch ends at halftime.
+  Votes for one team also count against the other, and the majority decides, so a few mistimed events no longer
+  flip a whole game.
+
+      votes = DirectionVotes()
+      for event in candidate_events:
+        votes.add(event)
+      directions = votes.directions()    # {team_id: first-half direction}
+  """
+
+  def __init__(self):
+    self.votes = {}
+
+  def add(self, event):
+    team = _team_key(event)
+    if team is None:
+      return
+    # every possession team is registered, so a team without votes of its own still follows its opponents'
+    team_votes = self.votes.setdefault(team, {'left': 0, 'right': 0})
+    side = event_basket_side(event) if _has_moments(event) else None
+    if side is None:
+      return
+    if _event_quarter(event) >= 3:
+      side = _OTHER_SIDE[side]
+    team_votes[side] += 1
+
+  def directions(self):
+    """Returns {team_id: 'left' / 'right'}, the basket each team attacks in the first half; ties leave teams out."""
+    directions = {}
+    for team, team_votes in self.votes.items():
+      # opponents attacking the left basket are evidence for this team attacking the right one
+      left = team_votes['left'] + sum(votes['right'] for other, votes in self.votes.items() if other != team)
+      right = team_votes['right'] + sum(votes['left'] for other, votes in self.votes.items() if other != team)
+      if left != right:
+        directions[team] = 'left' if left > right else 'right'
+    return directions
+
+def infer_directions(events):
+  """
+  This function takes an iterable of events and returns {gameid: {team_id: first-half direction}} (see DirectionVotes).
+  It only keeps the vote counts, so it can run as a cheap first pass over a streamed dataset.
+  """
+  votes = {}
   for event in events:
-    if ((event['event_info']['type'] == 5) and not math.isnan(event['event_info']['possession_team_id']) and event["event_info"]["desc_home"]!="nan" and event["event_info"]["desc_away"]!="nan") or ((event['event_info']['type'] == 1) and not math.isnan(event['event_info']['possession_team_id'])):
-      if event['gameid'] != game_id:
-        start_counter = 0
-
-      game_id = event['gameid']
-
-      if len(event['moments']) == 0:
-        continue
-
-      quarter = event['moments'][0]['quarter']
-
-      if quarter == 1 and start_counter == 0:
-        for moment in event['moments']:
-          if left_basket(moment):
-            first_poss_team_id = event['event_info']['possession_team_id']
-            first_direction = 'left'
-            second_direction = 'right'
-            if game_id in ["0021500292", "0021500648"]:
-              first_direction = 'right'
-              second_direction = 'left'
-            event['event_info']['direction'] = first_direction
-            start_counter += 1
-            break
-          elif right_basket(moment):
-            first_poss_team_id = event['event_info']['possession_team_id']
-            first_direction = 'right'
-            second_direction = 'left'
-            if game_id == "0021500648":
-              first_direction = 'left'
-              second_direction = 'right'
-            event['event_info']['direction'] = first_direction
-            start_counter += 1
-            break
-      elif quarter < 3:
-        if event['event_info']['possession_team_id'] == first_poss_team_id:
-          direction = first_direction
-        else:
-          direction = second_direction
-        event['event_info']['direction'] = direction
-      elif quarter >= 3:
-        if event['event_info']['possession_team_id'] == first_poss_team_id:
-          direction = second_direction
-        else:
-          direction = first_direction
-        event['event_info']['direction'] = direction
-
-      if 'direction' not in event['event_info']:
-        continue
-
-      # assign now rotate coordinates based on direction
-      if event['event_info']['direction'] == 'left':
-        for moment in event['moments']:
-
-          ball_x = moment['ball_coordinates']['y']
-          ball_y = 94 - moment['ball_coordinates']['x']
-          moment['ball_coordinates']['x'] = ball_x
-          moment['ball_coordinates']['y'] = ball_y
-
-          for player_coord in moment['player_coordinates']:
-            x = player_coord['y']
-            y = 94 - player_coord['x']
-            player_coord['x'] = x
-            player_coord['y'] = y
+    if is_candidate_event(event):
+      votes.setdefault(_game_key(event), DirectionVotes()).add(dequantize(event))
+  return {game_id: game_votes.directions() for game_id, game_votes in votes.items()}
+
+def event_direction(event, directions):
+  """
+  This function takes an event and its game's {team_id: first-half direction} and returns the event's direction of play,
+  switched from the third quarter on, or None when the possession team's direction is unknown.
+  """
+  direction = directions.get(_team_key(event))
+  if direction is None or not _has_moments(event):
+    return None
+  return _OTHER_SIDE[direction] if _event_quarter(event) >= 3 else direction
 
+def _stage(stats, name):
+  return stats.stage(name) if stats is not None else nullcontext()
+
+def _event_frames(event):
+  return len(event['positions'] if 'positions' in event else event['moments'])
+
+def process_candidate_event(event, direction, find_screens=True, stats=None):
+  """
+  This function takes a candidate event and its direction of play and prepares it on its own:
+  it rotates the court, adds kinematics to turnovers, locates the event frame and, with find_screens, the screen segments.
+  With stats (an instrumentation.PipelineStats), the time of each step is added to the current game.
+  Operates in-place on the event dict and returns it.
+  """
+  event['event_info']['direction'] = direction
+  with _stage(stats, 'normalize'):
+    normalize_court(event, direction)
+
+  if event['event_info']['type'] == 5:
+    with _stage(stats, 'kinematics'):
+      event = add_kinematics(event)
+
+  # the frame where the turnover / made shot happens, kept as an index into the event's frames
+  with _stage(stats, 'localize'):
+    frame = locate_event_frame(event)
+    moment = event_moment(event, frame)
+  event["event_info"]["quarter"] = moment["quarter"]
+  event["event_info"]["game_clock"] = moment["game_clock"]
+  event["event_info"]["shot_clock"] = moment["shot_clock"]
+  event["event_info"]["event_frame"] = frame
+  event["event_info"]["event_type"] = "turnover" if event['event_info']['type'] == 5 else "made shot"
+  event["event_info"]["game_id"] = event['gameid']
+
+  # method to find screen situations for potential pnr / pnp for each event
+  if find_screens:
+    with _stage(stats, 'screens'):
+      xy, player_ids, team_ids = event_xy(event)
+      roles = locate_roles(xy, player_ids, team_ids == event['event_info']['possession_team_id'])
+      segments = find_screen_segments(xy, roles, event_clock(event))
+    event['event_info']['screen_potential'] = len(segments) > 0
+    event['event_info']['screen_segments'] = segments
+  if stats is not None:
+    stats.add(events=1, frames=_event_frames(event))
+  return event
+
+def _skip_reason(event):
+  return 'no_moments' if not _has_moments(event) else 'no_direction'
+
+def _filter_game(game_id, events, find_screens, directions=None, not_candidates=0, stats=None):
+  # events are the candidate events of one game; returns the processed events and, with stats, the game's record
+  if stats is True:
+    from .instrumentation import PipelineStats
+    stats = PipelineStats('filter')
+  if stats is not None:
+    stats.enter(game_id)
+    stats.skip('not_candidate', not_candidates)
+
+  if directions is None:
+    with _stage(stats, 'direction'):
+      votes = DirectionVotes()
+      for event in events:
+        votes.add(event)
+      directions = votes.directions()
+  filtered = []
+  for event in events:
+    direction = event_direction(event, directions)
+    if direction is not None:
+      filtered.append(process_candidate_event(event, direction, find_screens, stats))
+    elif stats is not None:
+      stats.skip(_skip_reason(event))
+
+  if stats is None:
+    return filtered, []
+  stats.finish()
+  return filtered, stats.records()[-1:]
+
+def _candidate_games(events):
+  # (game_id, candidate events, number of other events) for each run of consecutive events of the same game
+  from itertools import groupby
+
+  for game_id, game_events in groupby(events, key=_game_key):
+    candidates, not_candidates = [], 0
+    for event in game_events:
+      if is_candidate_event(event):
+        candidates.append(dequantize(event))
       else:
-        for moment in event['moments']:
-
-          ball_x = 50 - moment['ball_coordinates']['y']
-          ball_y = moment['ball_coordinates']['x']
-          moment['ball_coordinates']['x'] = ball_x
-          moment['ball_coordinates']['y'] = ball_y
-
-          for player_coord in moment['player_coordinates']:
-            x = 50 - player_coord['y']
-            y = player_coord['x']
-            player_coord['x'] = x
-            player_coord['y'] = y
-            
-      if event['event_info']['direction'] == 'left':
-        for moment in event['moments']:
-          
-          ball_x = 50 - moment['ball_coordinates']['x']
-          ball_y = 94 - moment['ball_coordinates']['y']
-          moment['ball_coordinates']['x'] = ball_x
-          moment['ball_coordinates']['y'] = ball_y
-
-          for player_coord in moment['player_coordinates']:
-            x = 50 - player_coord['x']
-            y = 94 - player_coord['y']
-            player_coord['x'] = x
-            player_coord['y'] = y
-      
-      
-      def add_speed_and_direction_unitvec(event, fps=25):
-          """
-          Adds 'speed', 'dir_x', 'dir_y' (unit direction vector) to each player and the ball
-          in each frame of event['moments'].
-          Operates in-place on the event dict.
-          """
-          dt = 1 / fps
-          moments = event["moments"]
-
-          for t in range(1, len(moments)):
-              prev = moments[t - 1]
-              curr = moments[t]
-
-              # --- Ball ---
-              bx_prev, by_prev = prev["ball_coordinates"]["x"], prev["ball_coordinates"]["y"]
-              bx_curr, by_curr = curr["ball_coordinates"]["x"], curr["ball_coordinates"]["y"]
-
-              dx, dy = bx_curr - bx_prev, by_curr - by_prev
-              dist = np.sqrt(dx**2 + dy**2)
-              speed = dist / dt
-              dir_x = dx / dist if dist != 0 else 0
-              dir_y = dy / dist if dist != 0 else 0
-
-              curr["ball_coordinates"]["speed"] = speed
-              curr["ball_coordinates"]["dir_x"] = dir_x
-              curr["ball_coordinates"]["dir_y"] = dir_y
-
-              # --- Players ---
-              prev_coords = {p["playerid"]: (p["x"], p["y"]) for p in prev["player_coordinates"]}
-              for p in curr["player_coordinates"]:
-                  pid = p["playerid"]
-                  if pid in prev_coords:
-                      x1, y1 = prev_coords[pid]
-                      dx, dy = p["x"] - x1, p["y"] - y1
-                      dist = np.sqrt(dx**2 + dy**2)
-                      p["speed"] = dist / dt
-                      p["dir_x"] = dx / dist if dist != 0 else 0
-                      p["dir_y"] = dy / dist if dist != 0 else 0
-                  else:
-                      p["speed"] = np.nan
-                      p["dir_x"] = np.nan
-                      p["dir_y"] = np.nan
-
-          # Initialize first frame with NaNs (no prior)
-          for p in moments[0]["player_coordinates"]:
-              p["speed"] = np.nan
-              p["dir_x"] = np.nan
-              p["dir_y"] = np.nan
-          moments[0]["ball_coordinates"]["speed"] = np.nan
-          moments[0]["ball_coordinates"]["dir_x"] = np.nan
-          moments[0]["ball_coordinates"]["dir_y"] = np.nan
-
-          return event
-      if event['event_info']['type'] == 5:
-        event = add_speed_and_direction_unitvec(event)
-        handler_has_ball = False
-        lost_possession = False
-        moments = event["moments"]
-        for moment in moments:
-          event_team = event["primary_info"]["team_id"]
-          event_player = event["primary_info"]["player_id"]
-
-          for player_coord in moment['player_coordinates']:
-              if player_coord['playerid'] == event_player:
-                handler_x =player_coord["x"]
-                handler_y = player_coord["y"]
-
-          ball_x = moment['ball_coordinates']['x']
-          ball_y = moment['ball_coordinates']['y']
-          ball_spped = moment["ball_coordinates"]["speed"]
-          
-          if not lost_possession:
-            if handler_has_ball == False:
-              if np.linalg.norm(np.array([ball_x,ball_y])-np.array([handler_x,handler_y]))<2:
-                handler_has_ball = True
-            else:
-              if np.linalg.norm(np.array([ball_x,ball_y])-np.array([handler_x,handler_y]))>5:
-                lost_possession = True
-          else:
-            if ball_spped<3:
-              break
-        event["event_info"]["quarter"] = moment["quarter"]
-        event["event_info"]["game_clock"] = moment["game_clock"]
-        event["event_info"]["shot_clock"] = moment["shot_clock"]
-        event["event_info"]["event_moment"] = moment
-        event["event_info"]["event_type"] = "turnover"
-          
-      if event["event_info"]["type"] == 1:
-        moments = event["moments"]
-        for moment in moments:
-          event_team = event["primary_info"]["team_id"]
-          event_player = event["primary_info"]["player_id"]
-          ball_x = moment['ball_coordinates']['x']
-          ball_y = moment['ball_coordinates']['y']
-          if np.linalg.norm(np.array([ball_x,ball_y])-np.array([25,89.25])) < 1.5:
-            break
-        event["event_info"]["quarter"] = moment["quarter"]
-        event["event_info"]["game_clock"] = moment["game_clock"]
-        event["event_info"]["shot_clock"] = moment["shot_clock"]
-        event["event_info"]["event_type"] = "made shot"
-      
-      event["event_info"]["game_id"] = game_id
-        
-
-      # method to find screen situations for potential pnr / pnp for each event
-      # event_poss_team_id = event['event_info']['possession_team_id']
-      handler_id = None
-      defender_id = None
-      screener_id = None
-
-      last_clock = 0
-      screen_frame_start = None
-      frame_id = 0
-      screen_frame_count = 0
-      num_moments = len(event['moments'])
-
-      # for moment in event['moments']:
-        # current_handler = locate_ballhandler(moment, event_poss_team_id)
-        # current_defender = locate_defender(moment, event_poss_team_id, current_handler)
-        # current_screener = locate_screener(moment, event_poss_team_id, current_handler, current_defender)
-
-        # screen = find_screen(moment, event_poss_team_id, current_handler, current_defender, current_screener)
-
-        # current_clock = moment['game_clock']
-
-      #   if screen[0] == True and current_clock != last_clock:
-      #     if screen_frame_count == 0:
-      #       screen_frame_start = frame_id
-      #       screen_frame_count += 1
-      #       screen_time_stamp_start = moment['game_clock']
-
-      #       handler_id = current_handler
-      #       defender_id = current_defender
-      #       screener_id = current_screener
-
-      #     elif screen[1] == handler_id and screen[2] == defender_id and screen[3] == screener_id:
-      #       screen_frame_count += 1
-
-      #       handler_id = screen[1]
-      #       defender_id = screen[2]
-      #       screener_id = screen[3]
-
-      #   elif screen[0] == False and screen_frame_count > 8 and current_clock != last_clock:
-      #     event['event_info']['screen_potential'] = True
-      #     event['event_info']['handler_id'] = handler_id
-      #     event['event_info']['defender_id'] = defender_id
-      #     event['event_info']['screener_id'] = screener_id
-      #     event['event_info']['screen_frame_start'] = screen_frame_start
-      #     event['event_info']['screen_frame_end'] = frame_id
-      #     event['event_info']['screen_time_stamps'] = [round(screen_time_stamp_start, 2), round(moment['game_clock'])]
-      #     screen_frame_count = 0
-      #     break
-      #   else:
-      #     screen_frame_count = 0
-
-      #   frame_id += 1
-      #   last_clock = current_clock
-      #   if frame_id == num_moments:
-      #     event['event_info']['screen_potential'] = False
-      #     event['event_info']['handler_id'] = handler_id
-      #     event['event_info']['defender_id'] = defender_id
-      #     event['event_info']['screener_id'] = screener_id
-      #     event['event_info']['screen_frame_start'] = screen_frame_start
-      #     event['event_info']['screen_frame_end'] = frame_id
-      #     event['event_info']['screen_time_stamps'] = [0, 0]
-      #     screen_frame_count = 0
-      #     break
-
-      # if event['event_info']['screen_potential'] == True:
-      yield event
\ No newline at end of file
+        not_candidates += 1
+    yield game_id, candidates, not_candidates
+
+def filter_candidate_events(events, find_screens=True, directions=None, num_proc=None, stats=None):
+  """
+  This function takes in an iterable of events and outputs a generator that is filtered to only include potential PNR/PNP actions.
+  It also modifies the events to be worked with in a uniform format by rotating the coordinates depending on the direction of play.
+  With find_screens, every screen segment of an event is stored in event['event_info']['screen_segments'] (see find_screen_segments).
+
+  The direction of play of each team is inferred per game from all of its candidate events (see DirectionVotes), so only the
+  candidate events of one game are held at a time; events of a game are expected to be consecutive, as in the dataset.
+  Passing `directions` from infer_directions (a first pass over the same events) processes every event on its own instead,
+  in constant memory, e.g. over load_dataset(..., streaming=True).
+  With num_proc, games are processed in a pool of that many processes, keeping at most two games per process in flight;
+  events are still yielded in input order.
+  Events of a quantized build (positions_q / clock_q) are decoded first, see quantization.dequantize.
+  With stats (an instrumentation.PipelineStats), each game gets a record of step times, processed events and frames,
+  and skipped events by reason ('not_candidate', 'no_moments', 'no_direction').
+  """
+  if directions is not None and not num_proc:
+    try:
+      for event in events:
+        if stats is not None:
+          stats.enter(_game_key(event))
+        if not is_candidate_event(event):
+          if stats is not None:
+            stats.skip('not_candidate')
+          continue
+        dequantize(event)
+        direction = event_direction(event, directions.get(_game_key(event), {}))
+        if direction is not None:
+          yield process_candidate_event(event, direction, find_screens, stats)
+        elif stats is not None:
+          stats.skip(_skip_reason(event))
+    finally:
+      if stats is not None:
+        stats.finish()
+    return
+
+  games = _candidate_games(events)
+  if not num_proc:
+    for game_id, game_events, not_candidates in games:
+      game_directions = None if directions is None else directions.get(game_id, {})
+      filtered, _ = _filter_game(game_id, game_events, find_screens, game_directions, not_candidates, stats)
+      yield from filtered
+    return
+
+  from collections import deque
+  from concurrent.futures import ProcessPoolExecutor
+
+  with ProcessPoolExecutor(num_proc) as pool:
+    pending = deque()
+
+    def finished():
+      filtered, records = pending.popleft().result()
+      if stats is not None:
+        stats.extend(records)
+      return filtered
+
+    for game_id, game_events, not_candidates in games:
+      game_directions = None if directions is None else directions.get(game_id, {})
+      # workers keep their own stats and send the game's record back
+      pending.append(pool.submit(_filter_game, game_id, game_events, find_screens, game_directions, not_candidates, True if stats is not None else None))
+      if len(pending) >= 2 * num_proc:
+        yield from finished()
+    while pending:
+      yield from finished()
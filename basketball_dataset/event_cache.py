@@ -0,0 +1,233 @@
+"""On-disk cache of processed candidate events.
+
+filter_candidate_events output (court-normalized, kinematics-enriched, labeled events) is stored as one
+Parquet file per game, named by game id and a version hash of the pipeline source and of the build options of the
+events (frame_rate, dedupe_frames, ...). Editing the pipeline or building with other options changes the hash, so
+stale entries are never read; they are evicted first once the cache grows past its size budget, followed by the
+least recently used games.
+
+    cache = EventCache()
+    events = list(cache.filter_candidate_events(dataset["train"]))
+"""
+
+import hashlib
+import os
+from itertools import groupby
+
+import numpy as np
+
+from .dataset_operations import filter_candidate_events, is_candidate_event
+from .quantization import QUANTIZED_FIELDS
+
+# bump when the stored layout changes
+CACHE_FORMAT = 1
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "NBA_TRACKING_EVENT_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "nba_tracking_data_15_16", "events"),
+)
+DEFAULT_MAX_BYTES = 20 * 1024 ** 3
+
+# modules whose source determines the processed events
+_SOURCE_MODULES = ("dataset_operations", "quantization", "resampling", "tracking_arrays")
+
+# array fields of "tensor" layout events and the dtypes they are restored with
+_ARRAY_FIELDS = {"positions": np.float32, "clock": np.float32, "player_table": np.int32, "speed": np.float32, "direction": np.float32}
+
+
+def pipeline_version(find_screens=True, build_options=None):
+    """
+    Returns a short hash of the pipeline source, the cache format, the filter options and the build options
+    the events were generated with.
+    """
+    digest = hashlib.sha256()
+    directory = os.path.dirname(__file__)
+    for module in _SOURCE_MODULES:
+        with open(os.path.join(directory, module + ".py"), "rb") as fp:
+            digest.update(fp.read())
+    digest.update(f"format={CACHE_FORMAT};find_screens={bool(find_screens)};build={sorted((build_options or {}).items())}".encode())
+    return digest.hexdigest()[:16]
+
+
+def dataset_build_id(dataset):
+    """
+    Returns what identifies the build options of a datasets.Dataset: the builder config id (config name plus a hash of
+    options such as frame_rate) of the directory its Arrow files are in and the first file's name, which differs for
+    the output of map; or its fingerprint for an in-memory dataset.
+    Unlike the fingerprint, this does not change with with_format / with_transform or select.
+    """
+    if dataset.cache_files:
+        # <cache_dir>/<dataset name>/<config id>/<version>/<file>.arrow
+        path = dataset.cache_files[0]["filename"]
+        return f"{os.path.basename(os.path.dirname(os.path.dirname(path)))}/{os.path.basename(path)}"
+    return dataset._fingerprint
+
+
+def _event_layout(fields):
+    """
+    Returns the event layout of a dataset's columns or an event's keys: 'moments', 'tensor', or 'tensor-quantized' for
+    a quantized build, whose decoded positions differ from the float build's.
+    """
+    if "events" in fields:
+        raise ValueError('rows of a layout="game" dataset are whole games; cache tracking_arrays.GameEvents(dataset) instead')
+    if QUANTIZED_FIELDS["positions"][0] in fields:
+        return "tensor-quantized"
+    if "positions" in fields:
+        return "tensor"
+    if "moments" in fields:
+        return "moments"
+    raise ValueError(f"events need 'moments', 'positions' or positions_q, got {sorted(fields)}")
+
+
+def _to_row(event):
+    row = {}
+    for key, value in event.items():
+        if isinstance(value, np.ndarray):
+            value = value.tolist()
+        elif key == "kinematics":
+            value = {name: np.asarray(values).tolist() for name, values in value.items()}
+        row[key] = value
+    return row
+
+
+def _from_row(row):
+    for key, dtype in _ARRAY_FIELDS.items():
+        if key in row:
+            row[key] = np.array(row[key], dtype=dtype)
+    # only turnovers carry kinematics; Parquet fills the column with nulls for the other events
+    if "kinematics" in row and row["kinematics"] is None:
+        del row["kinematics"]
+    elif "kinematics" in row:
+        row["kinematics"] = {name: np.array(values, dtype=np.float64) for name, values in row["kinematics"].items()}
+    return row
+
+
+class EventCache:
+    """
+    Per-game cache of filter_candidate_events output under `root`, kept below `max_bytes`.
+    Entries are keyed by game id, event format (see _event_layout) and pipeline_version(find_screens, build_options).
+    `build_options` are the builder options of the events (e.g. {"frame_rate": 5}) and must be given for events that
+    are not a datasets.Dataset; a Dataset's options are taken from its builder config (see dataset_build_id).
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, find_screens=True, build_options=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.find_screens = find_screens
+        self.build_options = build_options
+        self.version = pipeline_version(find_screens, build_options)
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, game_id, layout="moments"):
+        return os.path.join(self.root, f"{game_id}.{layout}.{self.version}.parquet")
+
+    def __contains__(self, key):
+        game_id, layout = key if isinstance(key, tuple) else (key, "moments")
+        return os.path.exists(self.path(game_id, layout))
+
+    def load(self, game_id, layout="moments"):
+        """Returns the cached events of a game as a list, or None when the game is not cached."""
+        import pyarrow.parquet as pq
+
+        path = self.path(game_id, layout)
+        try:
+            table = pq.read_table(path)
+        except FileNotFoundError:
+            return None
+        # mtime marks the last use for eviction
+        os.utime(path)
+        return [_from_row(row) for row in table.to_pylist()]
+
+    def store(self, game_id, events, layout="moments"):
+        """Writes the processed events of a game, then evicts entries beyond the size budget."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self.path(game_id, layout)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(pa.Table.from_pylist([_to_row(event) for event in events]), tmp_path)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+
+    def entries(self):
+        """Returns (path, size, mtime, current_version) for every cache file."""
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".parquet"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime, name.endswith(f".{self.version}.parquet")))
+        return entries
+
+    def evict(self, keep=None):
+        """Removes entries of other pipeline versions, then the least recently used ones, until the cache fits max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _, _ in entries)
+        for path, size, _, _ in sorted(entries, key=lambda entry: (entry[3], entry[2])):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for path, _, _, _ in self.entries():
+            os.remove(path)
+
+    def filter_candidate_events(self, events, num_proc=None):
+        """
+        Cached version of dataset_operations.filter_candidate_events: yields the candidate events of every game,
+        read from the cache when the game is there and computed and stored otherwise.
+        For a datasets.Dataset, the rows of cached games are not even read; any other iterable is still consumed
+        in full, but only uncached games are processed. Events of a game are expected to be consecutive.
+        """
+        if hasattr(events, "column_names") and hasattr(events, "select"):
+            build_options = {**(self.build_options or {}), "dataset": dataset_build_id(events)}
+            cache = EventCache(self.root, self.max_bytes, self.find_screens, build_options)
+            yield from cache._filter_dataset(events, num_proc)
+            return
+
+        for game_id, game_events in groupby(events, key=lambda event: event["gameid"]):
+            candidates = [event for event in game_events if is_candidate_event(event)]
+            if not candidates:
+                continue
+            layout = _event_layout(candidates[0])
+            cached = self.load(game_id, layout)
+            if cached is None:
+                cached = list(filter_candidate_events(candidates, find_screens=self.find_screens))
+                self.store(game_id, cached, layout)
+            yield from cached
+
+    def _filter_dataset(self, dataset, num_proc):
+        layout = _event_layout(dataset.column_names)
+        game_ids = dataset["gameid"]
+        rows = {}
+        for row, game_id in enumerate(game_ids):
+            rows.setdefault(game_id, []).append(row)
+
+        missing = {game_id for game_id in rows if (game_id, layout) not in self}
+        missing_rows = [row for game_id in rows if game_id in missing for row in rows[game_id]]
+        # computed games come out in dataset order; games without candidates produce no group
+        computed = groupby(
+            filter_candidate_events(dataset.select(missing_rows), find_screens=self.find_screens, num_proc=num_proc),
+            key=lambda event: event["gameid"],
+        )
+        group = next(computed, None)
+        for game_id in rows:
+            if game_id not in missing:
+                yield from self.load(game_id, layout) or []
+                continue
+            game_events = []
+            if group is not None and group[0] == game_id:
+                game_events = list(group[1])
+                group = next(computed, None)
+            self.store(game_id, game_events, layout)
+            yield from game_events
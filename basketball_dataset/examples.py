@@ -0,0 +1,145 @@
+"""Conversion of SportVU game events into builder examples.
+
+Shared by the dataset builder (nba_tracking_data_15_16) and the standalone pipeline (pipeline.py), so the pipeline
+does not import the loading script:
+  - event_examples joins each event of a game with its PBP row into the example fields without frames
+  - frame_fields converts an event's raw moments into the frame fields of a layout
+
+    with SportVuGame(path) as game:
+        for event, example in event_examples(game, pbp):
+            example.update(frame_fields(event["moments"], "tensor"))
+"""
+
+from .resampling import resample_frames
+from .tracking_arrays import arrays_to_moments, frames_to_arrays, moments_to_arrays
+
+
+def moments_to_dicts(moments):
+    return [
+        {
+            "quarter": moment[0],
+            "game_clock": moment[2],
+            "shot_clock": moment[3],
+            "ball_coordinates": {
+                "x": moment[5][0][2],
+                "y": moment[5][0][3],
+                "z": moment[5][0][4]
+            },
+            "player_coordinates": [
+                {
+                    "teamid": i[0],
+                    "playerid": i[1],
+                    "x": i[2],
+                    "y": i[3],
+                    "z": i[4]
+                } for i in moment[5][1:]
+            ]
+        } for moment in moments
+    ]
+
+
+def frame_fields(moments, layout="moments", frame_rate=None, dedupe_frames=False):
+    """
+    This function takes the raw moments of an event and returns its frame fields in the "moments" or "tensor" layout:
+    {"moments": [...]} or positions / clock / player_table.
+    With frame_rate or dedupe_frames the frames are first resampled (see resampling.resample_frames) and the fields
+    include speed and direction computed at the full rate: 'speed', 'dir_x', 'dir_y' in every moment dict,
+    or speed (frames x 11) and direction (frames x 11 x 2) arrays.
+    """
+    if frame_rate is None and not dedupe_frames:
+        if layout == "tensor":
+            return moments_to_arrays(moments)
+        return {"moments": moments_to_dicts(moments)}
+    frames = resample_frames(frames_to_arrays(moments), frame_rate, dedupe_frames)
+    if layout == "tensor":
+        return {key: frames[key] for key in ("positions", "clock", "player_table", "speed", "direction")}
+    return {"moments": arrays_to_moments(frames["positions"], frames["clock"], frames["player_table"], frames["speed"], frames["direction"])}
+
+
+def event_examples(game, pbp, stats=None):
+    """
+    This function takes an open SportVuGame and the PbpIndex and yields (raw event, example without moments)
+    for every event with a PBP row.
+    """
+    game_id = game.gameid
+    game_date = game.gamedate
+
+    events = game.events() if stats is None else stats.timed(game.events(), "json_parse")
+    for event in events:
+        event_id = event["eventId"]
+
+        if stats is None:
+            event_row = pbp.lookup(game_id, event_id)
+        else:
+            with stats.stage("pbp_join"):
+                event_row = pbp.lookup(game_id, event_id)
+            if event_row is None:
+                stats.skip("pbp_missing")
+            else:
+                stats.add(events=1, frames=len(event["moments"]))
+        if event_row is None:
+            continue
+
+        event_type = event_row["EVENTMSGTYPE"]
+
+        # missing descriptions are NaN; stored as "nan" as the string features always encoded them,
+        # done here because nested "game" layout events are not cast per value
+        event_home_desc = str(event_row["HOMEDESCRIPTION"])
+
+        event_away_desc = str(event_row["VISITORDESCRIPTION"])
+
+        primary_home_away = event_row["PRIMARY_TEAM"]
+        primary_player_id = event_row["PLAYER1_ID"]
+        primary_team_id = event_row["PLAYER1_TEAM_ID"]
+
+        secondary_home_away = event_row["SECONDARY_TEAM"]
+        secondary_player_id = event_row["PLAYER2_ID"]
+        secondary_team_id = event_row["PLAYER2_TEAM_ID"]
+
+        poss_team_id = event_row["POSSESSION_TEAM_ID"]
+        poss_sequence = event_row["POSSESSION_SEQUENCE"]
+
+        visitor_name = event['visitor']['name']
+        visitor_team_id = event['visitor']['teamid']
+        visitor_abbrev = event['visitor']['abbreviation']
+        visitor_players = event['visitor']['players']
+
+        home_name = event['home']['name']
+        home_team_id = event['home']['teamid']
+        home_abbrev = event['home']['abbreviation']
+        home_players = event['home']['players']
+
+        yield event, {
+            "gameid": game_id,
+            "gamedate": game_date,
+            "event_info": {
+                "id": event_id,
+                "type": event_type,
+                "possession_team_id": poss_team_id,
+                "possession_sequence": poss_sequence,
+                "desc_home": event_home_desc,
+                "desc_away": event_away_desc
+            },
+            "primary_info": {
+                "team": primary_home_away,
+                "player_id": primary_player_id,
+                "team_id": primary_team_id
+                    },
+            "secondary_info": {
+                "team": secondary_home_away,
+                "player_id": secondary_player_id,
+                "team_id": secondary_team_id
+            },
+            "visitor": {
+                "name": visitor_name,
+                "teamid": visitor_team_id,
+                "abbreviation": visitor_abbrev,
+                "players": visitor_players
+            },
+            "home": {
+                "name": home_name,
+                "teamid": home_team_id,
+                "abbreviation": home_abbrev,
+                "players": home_players
+            }
+        }
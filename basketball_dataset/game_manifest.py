@@ -0,0 +1,218 @@
+"""Local manifest of the SportVU game archives used by the nba_tracking_data_15_16 builder.
+
+The manifest is a small versioned JSON file listing every game archive with its date, teams,
+archive size and (once resolved) game id. It is read lazily on first use so that importing the
+dataset script never touches the network.
+
+The builder reads the manifest committed next to the dataset script (MANIFEST_FILE, resolved through its download
+manager, so it also works under load_dataset), and otherwise the one in the user cache (DEFAULT_MANIFEST_PATH), which
+is fetched from GitHub once when missing. Regenerate the committed manifest with
+
+    python -m basketball_dataset.game_manifest --refresh --resolve-ids --path basketball_dataset/data/games_manifest.json
+
+Archive sizes and sha256 checksums used to verify downloads can be recorded from a local mirror with --checksums.
+"""
+
+import argparse
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+MANIFEST_VERSION = 1
+
+_REPO_DATA_PATH = "data/2016.NBA.Raw.SportVU.Game.Logs"
+ARCHIVE_URL = "https://github.com/linouk23/NBA-Player-Movements/raw/master/" + _REPO_DATA_PATH
+LISTING_URL = "https://api.github.com/repos/linouk23/NBA-Player-Movements/contents/" + _REPO_DATA_PATH
+
+# relative to the dataset script
+MANIFEST_FILE = "data/games_manifest.json"
+DEFAULT_MANIFEST_PATH = os.environ.get(
+    "NBA_TRACKING_MANIFEST",
+    os.path.join(os.path.expanduser("~"), ".cache", "nba_tracking_data_15_16", "games_manifest.json"),
+)
+
+_NAME_PATTERN = re.compile(r"(\d{2})\.(\d{2})\.(\d{4})\.([A-Z]{3})\.at\.([A-Z]{3})")
+
+_loaded = {}
+
+
+def parse_archive_name(name):
+    """
+    This function takes an archive name such as '01.01.2016.CHA.at.TOR.7z'.
+    It returns the game date (ISO format) and the visitor / home team abbreviations, or None for names that do not match.
+    """
+    match = _NAME_PATTERN.search(name)
+    if match is None:
+        return None
+    month, day, year, visitor, home = match.groups()
+    return {"gamedate": f"{year}-{month}-{day}", "visitor": visitor, "home": home}
+
+
+def archive_url(game):
+    """Returns the download URL of a manifest entry's .7z archive."""
+    return ARCHIVE_URL + "/" + game["name"]
+
+
+def fetch_listing():
+    """
+    Fetches the list of game archives from GitHub.
+    Returns a list of {'name', 'size'} dicts. Falls back to scraping the HTML tree page when the API is unavailable.
+    """
+    import requests
+
+    res = requests.get(LISTING_URL, timeout=60)
+    if res.ok:
+        return [{"name": item["name"], "size": item.get("size")} for item in res.json() if item["name"].endswith(".7z")]
+
+    res = requests.get(ARCHIVE_URL, timeout=60)
+    res.raise_for_status()
+    json_match = re.findall(r'{"items":*\[.*?\]', res.text, re.DOTALL)
+    items = json.loads(json_match[0] + "}")["items"]
+    return [{"name": item["name"], "size": None} for item in items if item["name"].endswith(".7z")]
+
+
+def build_manifest(listing, previous=None):
+    """
+    This function takes an archive listing (output of fetch_listing) and an optional previous manifest.
+    It returns a new manifest dict, keeping game ids that were already resolved in the previous manifest
+    and checksums of archives whose size has not changed.
+    """
+    known = {}
+    if previous is not None:
+        known = {game["name"]: game for game in previous["games"]}
+
+    games = []
+    for item in sorted(listing, key=lambda item: item["name"]):
+        parsed = parse_archive_name(item["name"]) or {"gamedate": None, "visitor": None, "home": None}
+        previous_game = known.get(item["name"], {})
+        game = {
+            "name": item["name"],
+            "gameid": previous_game.get("gameid"),
+            "gamedate": parsed["gamedate"],
+            "visitor": parsed["visitor"],
+            "home": parsed["home"],
+            "size": item["size"],
+        }
+        # a checksum only carries over while the archive size is unchanged
+        if previous_game.get("sha256") and previous_game.get("size") == item["size"]:
+            game["sha256"] = previous_game["sha256"]
+        games.append(game)
+
+    return {
+        "version": MANIFEST_VERSION,
+        "source": LISTING_URL,
+        "generated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "games": games,
+    }
+
+
+def write_manifest(manifest, path=None):
+    """Writes the manifest atomically to `path` (the default manifest location when None)."""
+    path = path or DEFAULT_MANIFEST_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, indent=1)
+    os.replace(tmp_path, path)
+    _loaded.pop(path, None)
+
+
+def read_manifest(path=None):
+    """Reads a manifest from disk, returning None when it is missing or written by another manifest version."""
+    path = path or DEFAULT_MANIFEST_PATH
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as fp:
+        manifest = json.load(fp)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def load_manifest(path=None):
+    """
+    Returns the game manifest, reading it once per process.
+    The network is only used when no manifest of the current version exists yet; the fetched listing is then stored at `path`.
+    """
+    path = path or DEFAULT_MANIFEST_PATH
+    if path not in _loaded:
+        manifest = read_manifest(path)
+        if manifest is None:
+            manifest = build_manifest(fetch_listing())
+            write_manifest(manifest, path)
+        _loaded[path] = manifest
+    return _loaded[path]
+
+
+def resolve_game_id(game):
+    """Downloads one archive and reads the 'gameid' field from the head of its JSON file."""
+    import tempfile
+
+    import py7zr
+    import requests
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archive_path = os.path.join(tmp_dir, game["name"])
+        with requests.get(archive_url(game), stream=True, timeout=300) as res:
+            res.raise_for_status()
+            with open(archive_path, "wb") as fp:
+                for chunk in res.iter_content(chunk_size=1 << 20):
+                    fp.write(chunk)
+        with py7zr.SevenZipFile(archive_path, mode="r") as archive:
+            archive.extractall(path=tmp_dir)
+        json_name = next(name for name in os.listdir(tmp_dir) if name.endswith(".json"))
+        with open(os.path.join(tmp_dir, json_name), encoding="utf-8") as fp:
+            head = fp.read(256)
+    match = re.search(r'"gameid"\s*:\s*"(\d+)"', head)
+    return match.group(1) if match else None
+
+
+def add_checksums(manifest, mirror):
+    """
+    Fills in 'size' and 'sha256' of every manifest entry from the archives of a local mirror directory,
+    so that downloads from any source are verified against them. Entries missing from the mirror are left as they are.
+    """
+    from .archives import sha256sum
+
+    for game in manifest["games"]:
+        path = os.path.join(mirror, game["name"])
+        if os.path.exists(path):
+            game["size"] = os.path.getsize(path)
+            game["sha256"] = sha256sum(path)
+    return manifest
+
+
+def refresh_manifest(path=None, resolve_ids=False):
+    """Re-fetches the archive listing and rewrites the manifest, optionally resolving missing game ids."""
+    previous = read_manifest(path)
+    manifest = build_manifest(fetch_listing(), previous)
+    if resolve_ids:
+        for game in manifest["games"]:
+            if game["gameid"] is None:
+                game["gameid"] = resolve_game_id(game)
+    write_manifest(manifest, path)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or refresh the local SportVU game manifest.")
+    parser.add_argument("--path", default=None, help=f"manifest location (defaults to {DEFAULT_MANIFEST_PATH})")
+    parser.add_argument("--refresh", action="store_true", help="re-fetch the archive listing from GitHub")
+    parser.add_argument("--resolve-ids", action="store_true", help="download archives to fill in missing game ids")
+    parser.add_argument("--checksums", metavar="MIRROR", help="record archive sizes and sha256 from a local mirror directory")
+    args = parser.parse_args(argv)
+
+    if args.refresh:
+        manifest = refresh_manifest(args.path, resolve_ids=args.resolve_ids)
+    else:
+        manifest = load_manifest(args.path)
+    if args.checksums:
+        manifest = add_checksums(manifest, args.checksums)
+        write_manifest(manifest, args.path)
+    resolved = sum(game["gameid"] is not None for game in manifest["games"])
+    print(f"{len(manifest['games'])} games ({resolved} with game ids), manifest version {manifest['version']}")
+
+
+if __name__ == "__main__":
+    main()
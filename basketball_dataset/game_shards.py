@@ -0,0 +1,163 @@
+"""Per-game cache of generated builder examples, shared by every config.
+
+The configs are nested prefixes of one deterministic game order (game_order), so "tiny" is the first games of
+"small", "small" of "medium" and so on. Each game's examples are stored once as an Arrow stream file named by game,
+layout and a version hash of the example-generation source; building a larger config only downloads and
+processes the games that are not cached yet and reads the rest back. Shards of other versions are evicted first once
+the cache grows past its size budget, followed by the least recently used games.
+
+    shards = GameShards(root, features, "tensor")
+    if "0021500001" in shards:
+        examples = shards.read("0021500001")
+    else:
+        examples = shards.write_through("0021500001", generate())   # yields while writing
+"""
+
+import hashlib
+import os
+import random
+
+# bump when the stored layout changes
+SHARD_FORMAT = 1
+
+DEFAULT_SHARD_DIR = os.environ.get(
+    "NBA_TRACKING_GAME_SHARDS",
+    os.path.join(os.path.expanduser("~"), ".cache", "nba_tracking_data_15_16", "games"),
+)
+DEFAULT_MAX_BYTES = 50 * 1024 ** 3
+# seed of the game order; the configs used to draw random.sample under the same seed
+GAME_ORDER_SEED = 9
+
+_BATCH_SIZE = 64
+_HASH_CHUNK = 1 << 20
+# modules whose source determines the generated examples
+_SOURCE_MODULES = (
+    "examples", "nba_tracking_data_15_16", "play_by_play", "quantization", "resampling", "sportvu_json", "tracking_arrays"
+)
+
+
+def game_order(games, seed=GAME_ORDER_SEED):
+    """Returns the manifest games in one fixed pseudo-random order, independent of the manifest's own order."""
+    ordered = sorted(games, key=lambda game: game["name"])
+    random.Random(seed).shuffle(ordered)
+    return ordered
+
+
+def file_fingerprint(path):
+    """Returns a short hash of a file's content, e.g. of the PBP CSV the examples embed fields of."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def shard_version(layout, options=None):
+    """Returns a short hash of the example-generation source, the shard format, the layout and the builder options."""
+    digest = hashlib.sha256()
+    directory = os.path.dirname(__file__)
+    for module in _SOURCE_MODULES:
+        with open(os.path.join(directory, module + ".py"), "rb") as fp:
+            digest.update(fp.read())
+    digest.update(f"format={SHARD_FORMAT};layout={layout};options={sorted((options or {}).items())}".encode())
+    return digest.hexdigest()[:16]
+
+
+class GameShards:
+    """
+    Examples of one layout, one Arrow file per game under `root`, stored in the encoded form of `features`
+    (the builder's datasets.Features) so they are read back exactly as they were generated.
+    `options` are the builder settings and inputs that change the examples (e.g. frame_rate, the PBP fingerprint),
+    part of the version hash. The cache is kept below `max_bytes` by evict.
+    """
+
+    def __init__(self, root=DEFAULT_SHARD_DIR, features=None, layout="moments", options=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.features = features
+        self.layout = layout
+        self.options = options
+        self.version = shard_version(layout, options)
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.root, f"{name}.{self.layout}.{self.version}.arrow")
+
+    def __contains__(self, name):
+        return os.path.exists(self.path(name))
+
+    def read(self, name):
+        """Yields the cached examples of a game one at a time."""
+        import pyarrow as pa
+
+        # Array2D / Array3D columns come back as NumPy arrays, as the builder generates them; a writer batch mixing
+        # them with nested lists is rejected
+        array_columns = [column for column, feature in self.features.items() if hasattr(feature, "shape")]
+        path = self.path(name)
+        # mtime marks the last use for eviction
+        os.utime(path)
+        with pa.memory_map(path) as source:
+            for batch in pa.ipc.open_stream(source):
+                rows = batch.to_pylist()
+                for column in array_columns:
+                    for row, values in zip(rows, batch.column(column).to_numpy(zero_copy_only=False)):
+                        row[column] = values
+                yield from rows
+
+    def write_through(self, name, examples):
+        """
+        Yields `examples` unchanged while writing them as the shard of game `name`.
+        The shard only appears once every example has been yielded, so an interrupted build leaves no partial entry.
+        """
+        # the writer the builder itself uses, so examples are encoded exactly as in the dataset
+        from datasets.arrow_writer import ArrowWriter
+
+        path = self.path(name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with ArrowWriter(features=self.features, path=tmp_path, writer_batch_size=_BATCH_SIZE) as writer:
+                for example in examples:
+                    writer.write(example)
+                    yield example
+                writer.finalize()
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def entries(self):
+        """Returns (path, size, mtime, current_version) for the shard file of every game, layout and version."""
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".arrow"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime, name.endswith(f".{self.layout}.{self.version}.arrow")))
+        return entries
+
+    def evict(self, keep=()):
+        """
+        Removes shards of other layouts and versions, then the least recently used ones, until the cache fits max_bytes.
+        Shards of the games in `keep` (e.g. the games a build is about to read back) are never removed.
+        """
+        keep = {self.path(name) for name in keep}
+        entries = self.entries()
+        total = sum(size for _, size, _, _ in entries)
+        for path, size, _, _ in sorted(entries, key=lambda entry: (entry[3], entry[2])):
+            if total <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for path, _, _, _ in self.entries():
+            os.remove(path)
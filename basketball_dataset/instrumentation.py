@@ -0,0 +1,168 @@
+"""Opt-in per-game counters for the build and filter pipelines.
+
+A PipelineStats collects one record per game:
+    {"pipeline", "game_id", "wall_seconds", "stages": {stage: seconds}, "events", "frames",
+     "skipped": {reason: count}, "bytes_read", "process_peak_rss_mb", "peak_rss_growth_mb"}
+process_peak_rss_mb is the peak RSS of the whole process when the game finished, so it includes every earlier game;
+peak_rss_growth_mb is how much that peak rose while the game was current (0 when an earlier game used more).
+Records are kept in memory and, with a log path, appended to a JSON-lines file as each game finishes,
+which also collects the records of num_proc build workers.
+
+    stats = PipelineStats("filter")
+    events = list(filter_candidate_events(events, stats=stats))
+    slowest = sorted(stats.records(), key=lambda record: record["wall_seconds"])[-5:]
+
+    load_dataset(..., "medium", stats_path="build_stats.jsonl")
+    records = read_records("build_stats.jsonl")
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process so far in MB, or None where it is not available."""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 2 ** 20 if os.uname().sysname == "Darwin" else 2 ** 10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class PipelineStats:
+    """
+    Per-game wall time by stage, events and frames processed, skips by reason, bytes read, the process peak RSS
+    and its growth during the game.
+    Counters always apply to the current game, set with game(game_id) or enter(game_id).
+    """
+
+    def __init__(self, pipeline, log_path=None):
+        self.pipeline = pipeline
+        self.log_path = log_path
+        self._records = []
+        self._current = None
+        self._started = None
+        self._started_rss = None
+
+    def enter(self, game_id):
+        """Makes `game_id` the current game, finishing the previous one when it differs."""
+        if self._current is not None and self._current["game_id"] == game_id:
+            return
+        self.finish()
+        self._current = {
+            "pipeline": self.pipeline,
+            "game_id": game_id,
+            "wall_seconds": 0.0,
+            "stages": {},
+            "events": 0,
+            "frames": 0,
+            "skipped": {},
+            "bytes_read": 0,
+            "process_peak_rss_mb": None,
+            "peak_rss_growth_mb": None,
+        }
+        self._started = time.perf_counter()
+        self._started_rss = peak_rss_mb()
+
+    def finish(self):
+        """Closes the current game's record and writes it to the log."""
+        record = self._current
+        if record is None:
+            return
+        record["wall_seconds"] = time.perf_counter() - self._started
+        record["process_peak_rss_mb"] = peak_rss_mb()
+        if record["process_peak_rss_mb"] is not None:
+            record["peak_rss_growth_mb"] = record["process_peak_rss_mb"] - self._started_rss
+        self._records.append(record)
+        self._current = None
+        if self.log_path:
+            # one short append per game, so records of concurrent workers do not interleave
+            with open(self.log_path, "a") as fp:
+                fp.write(json.dumps(record) + "\n")
+
+    @contextmanager
+    def game(self, game_id):
+        self.enter(game_id)
+        try:
+            yield self
+        finally:
+            self.finish()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name, seconds):
+        stages = self._current["stages"]
+        stages[name] = stages.get(name, 0.0) + seconds
+
+    def timed(self, iterable, name):
+        """Yields from `iterable`, counting the time spent producing each item as stage `name`."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def add(self, events=0, frames=0, bytes_read=0):
+        self._current["events"] += events
+        self._current["frames"] += frames
+        self._current["bytes_read"] += bytes_read
+
+    def skip(self, reason, count=1):
+        skipped = self._current["skipped"]
+        skipped[reason] = skipped.get(reason, 0) + count
+
+    def extend(self, records):
+        """Adds finished records, e.g. returned by a worker process."""
+        self._records.extend(records)
+        if self.log_path:
+            with open(self.log_path, "a") as fp:
+                fp.writelines(json.dumps(record) + "\n" for record in records)
+
+    def records(self):
+        """Returns the finished per-game records."""
+        return list(self._records)
+
+    def summary(self):
+        """Returns totals over all finished games: wall time, stage times, events, frames, skips, bytes and process peak RSS."""
+        return summarize(self._records)
+
+
+def summarize(records):
+    """
+    Sums a list of per-game records into one record without a game_id; process_peak_rss_mb is the maximum
+    and peak_rss_growth_mb the largest growth of a single game.
+    """
+    total = {"games": len(records), "wall_seconds": 0.0, "stages": {}, "events": 0, "frames": 0, "skipped": {}, "bytes_read": 0}
+    peaks = [record["process_peak_rss_mb"] for record in records if record.get("process_peak_rss_mb") is not None]
+    growths = [record["peak_rss_growth_mb"] for record in records if record.get("peak_rss_growth_mb") is not None]
+    for record in records:
+        for key in ("wall_seconds", "events", "frames", "bytes_read"):
+            total[key] += record[key]
+        for group in ("stages", "skipped"):
+            for name, value in record[group].items():
+                total[group][name] = total[group].get(name, 0) + value
+    total["process_peak_rss_mb"] = max(peaks) if peaks else None
+    total["peak_rss_growth_mb"] = max(growths) if growths else None
+    return total
+
+
+def read_records(log_path):
+    """Reads the per-game records of a JSON-lines stats log."""
+    with open(log_path) as fp:
+        return [json.loads(line) for line in fp if line.strip()]
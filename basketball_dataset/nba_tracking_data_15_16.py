@@ -13,17 +13,21 @@
 # limitations under the License.
 """This is tracking data of the 2015-2016 NBA season"""
 
-import csv
-import json
 import os
-import py7zr
-import re
 
 import datasets
-import requests
-import random
+import time
 
-import pandas as pd
+from .archives import MIRROR_ENV, PBP_FILENAME, extract_ahead, mirror_url, shard_extract_workers
+from .examples import event_examples, frame_fields
+from .game_manifest import ARCHIVE_URL, MANIFEST_FILE, load_manifest
+from .game_shards import DEFAULT_MAX_BYTES, DEFAULT_SHARD_DIR, GameShards, file_fingerprint, game_order
+from .instrumentation import PipelineStats
+from .play_by_play import PBP_URL, load_pbp_index
+from .quantization import quantize_arrays
+from .resampling import resample_frames
+from .sportvu_json import SportVuGame
+from .tracking_arrays import N_PLAYERS, N_SLOTS, GameFrameTable, compact_players, frames_to_arrays
 
 
 _CITATION = """\
@@ -41,50 +45,85 @@ By merging all .7z files into one large .json file, access is easier to retrieve
 """
 
 _HOMEPAGE = "https://github.com/linouk23/NBA-Player-Movements/tree/master/"
-_URL = "https://github.com/linouk23/NBA-Player-Movements/raw/master/data/2016.NBA.Raw.SportVU.Game.Logs"
-_PBP_URL = "https://github.com/sumitrodatta/nba-alt-awards/raw/main/Historical/PBP%20Data/2015-16_pbp.csv"
-
-res = requests.get(_URL)
-text = res.text
-
-json_pattern = r'{"items":*\[.*?\]'
-json_match = re.findall(json_pattern, text, re.DOTALL)
-
-ITEMS = json.loads(json_match[0]+"}")['items']
-
-def home_away_event_conversion(number):
-    if pd.isna(number.item()):
-        return None
-    if int(number.item()) == 4:
-        return "home"
-    elif int(number.item()) == 5:
-        return "away"
-    else:
-        return None
-        
-def identify_offense(row):
-    identified_offense_events = [1, 2, 3, 4, 5]
-    if int(row['EVENTMSGTYPE'].item()) in identified_offense_events:
-        poss_team_id = row['PLAYER1_TEAM_ID'].item()
-    elif ("OFF.FOUL" in str(row["HOMEDESCRIPTION"].item())) or ("OFF.FOUL" in str(row["VISITORDESCRIPTION"].item())):
-        poss_team_id = row['PLAYER1_TEAM_ID'].item()
-    elif int(row['EVENTMSGTYPE'].item()) == 6:
-        poss_team_id = row['PLAYER2_TEAM_ID'].item()
-    else:
-        poss_team_id = None
-    return poss_team_id
+_URL = ARCHIVE_URL
+_PBP_URL = PBP_URL
+
+
+def __getattr__(name):
+    # ITEMS used to be fetched from GitHub at import time; it is now resolved from the local manifest on first access.
+    if name == "ITEMS":
+        return load_manifest()["games"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class NbaTrackingConfig(datasets.BuilderConfig):
     """BuilderConfig for NbaTracking"""
 
-    def __init__(self, samples, **kwargs):
+    LAYOUTS = ("moments", "tensor", "game")
+
+    def __init__(self, samples=None, manifest_path=None, layout="moments", stats_path=None, mirror=None, extract_workers=None,
+                 cache_games=True, game_cache_dir=None, game_cache_max_bytes=None, frame_rate=None, dedupe_frames=False, quantize=False,
+                 **kwargs):
+        """
+        samples: number of games taken from the front of game_shards.game_order, None for every game;
+            so every config's games are the first games of the next larger one.
+        manifest_path: location of the game manifest. Defaults to data/games_manifest.json next to this script, or to
+            game_manifest.DEFAULT_MANIFEST_PATH in the user cache when the script has none.
+        layout: "moments" stores each frame as nested dicts, "tensor" stores each event as fixed-shape float32 arrays
+            (positions: frames x 11 x 3, clock: frames x 3, player_table: 10 x (playerid, teamid)),
+            e.g. load_dataset(..., "medium", layout="tensor").with_format("numpy").
+            "game" stores one example per game with a deduplicated, time-ordered frame table and every event as a
+            range of its rows; read it per event through tracking_arrays.GameEvents.
+        stats_path: when set, per-game build stats (stage times, events, frames, skips, bytes read, process peak RSS
+            and its growth) are appended to this JSON-lines file, see instrumentation.read_records.
+        mirror: directory or http(s) URL holding the game archives and 2015-16_pbp.csv under their original names,
+            used instead of GitHub; defaults to the NBA_TRACKING_MIRROR environment variable.
+        extract_workers: processes verifying and extracting archives ahead of example generation, per build process.
+            Defaults to the CPU count divided by download_and_prepare's num_proc, so the shard workers' pools share the cores.
+        cache_games: store each game's examples in a per-game shard (see game_shards) shared by all configs, so building
+            a larger config only downloads and processes the games no earlier build has produced. This keeps a second
+            copy of the built games, up to game_cache_max_bytes; set it to False to skip the cache.
+        game_cache_dir: location of the per-game shards, defaults to game_shards.DEFAULT_SHARD_DIR.
+        game_cache_max_bytes: size budget of the per-game shards, defaults to game_shards.DEFAULT_MAX_BYTES. It is enforced
+            before each build by evicting shards of other options or sources first, then the least recently used games.
+        frame_rate: resample every event to this rate in Hz (e.g. 5 or 10) instead of SportVU's 25 Hz, interpolating positions.
+        dedupe_frames: drop frames that repeat the previous frame's game_clock.
+            With either option, speed and direction are computed at 25 Hz before frames are dropped and stored with the
+            frames (see resampling), and filter_candidate_events uses them instead of recomputing them.
+        quantize: with the "tensor" or "game" layout, store positions as int16 0.01 ft and clocks as int32 0.01 units,
+            delta-encoded along frames, in positions_q / clock_q (see quantization). Read them back with
+            dataset.with_transform(quantization.decode_quantized), or through GameEvents for the "game" layout.
+        """
         super().__init__(**kwargs)
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"layout must be one of {self.LAYOUTS}, got {layout!r}")
+        if quantize and layout == "moments":
+            raise ValueError('quantize needs the "tensor" or "game" layout')
         self.samples = samples
+        self.manifest_path = manifest_path
+        self.layout = layout
+        self.stats_path = stats_path
+        self.mirror = mirror or os.environ.get(MIRROR_ENV)
+        self.extract_workers = extract_workers
+        self.cache_games = cache_games
+        self.game_cache_dir = game_cache_dir or DEFAULT_SHARD_DIR
+        self.game_cache_max_bytes = game_cache_max_bytes or DEFAULT_MAX_BYTES
+        self.frame_rate = frame_rate
+        self.dedupe_frames = dedupe_frames
+        self.quantize = quantize
+
+    @property
+    def resampled(self):
+        return self.frame_rate is not None or self.dedupe_frames
+
+    def games(self, manifest_path=None):
+        return load_manifest(self.manifest_path or manifest_path)["games"]
+
+    def sampled_games(self, manifest_path=None):
+        return game_order(self.games(manifest_path))[:self.samples]
 
 class NbaTracking(datasets.GeneratorBasedBuilder):
     """Tracking data for all games of 2015-2016 season in forms of coordinates for players and ball at each moment."""
 
-    items = ITEMS
     _PBP_URL = _PBP_URL
     
     BUILDER_CONFIG_CLASS = NbaTrackingConfig
@@ -104,86 +143,120 @@ class NbaTracking(datasets.GeneratorBasedBuilder):
         ),
         NbaTrackingConfig(
             name = "full",
-            samples = len(items)
+            samples = None
         )
     ]
     
     def _info(self):
-        features = datasets.Features(
-            {    
-                "gameid": datasets.Value("string"),
-                "gamedate": datasets.Value("string"),
-                "event_info": {"id": datasets.Value("string"),
-                               "type": datasets.Value("int64"),
-                               "possession_team_id": datasets.Value("float64"),
-                               "desc_home": datasets.Value("string"),
-                               "desc_away": datasets.Value("string")
+        features = {
+            "gameid": datasets.Value("string"),
+            "gamedate": datasets.Value("string"),
+            "event_info": {"id": datasets.Value("string"),
+                           "type": datasets.Value("int64"),
+                           "possession_team_id": datasets.Value("float64"),
+                           "possession_sequence": datasets.Value("int64"),
+                           "desc_home": datasets.Value("string"),
+                           "desc_away": datasets.Value("string")
+                          },
+            "primary_info": {"team": datasets.Value("string"),
+                             "player_id": datasets.Value("float64"),
+                             "team_id": datasets.Value("float64")
+                            },
+            "secondary_info": {"team": datasets.Value("string"),
+                               "player_id": datasets.Value("float64"),
+                               "team_id": datasets.Value("float64")
                               },
-                "primary_info": {"team": datasets.Value("string"),
-                                 "player_id": datasets.Value("float64"),
-                                 "team_id": datasets.Value("float64")
-                                },
-                "secondary_info": {"team": datasets.Value("string"),
-                                   "player_id": datasets.Value("float64"),
-                                   "team_id": datasets.Value("float64")
-                                  },
-                "visitor": {
-                    "name": datasets.Value("string"),
-                    "teamid": datasets.Value("int64"),
-                    "abbreviation": datasets.Value("string"),
-                    "players": [
-                        {
-                        "lastname": datasets.Value("string"),
-                        "firstname": datasets.Value("string"),
-                        "playerid": datasets.Value("int64"),
-                        "jersey": datasets.Value("string"),
-                        "position": datasets.Value("string")
-                        }
-                    ]
-                },
-                "home": {
-                    "name": datasets.Value("string"),
-                    "teamid": datasets.Value("int64"),
-                    "abbreviation": datasets.Value("string"),
-                    "players": [
-                        {
-                        "lastname": datasets.Value("string"),
-                        "firstname": datasets.Value("string"),
-                        "playerid": datasets.Value("int64"),
-                        "jersey": datasets.Value("string"),
-                        "position": datasets.Value("string")
-                        }
-                    ]
-                },
-                "moments": [
+            "visitor": {
+                "name": datasets.Value("string"),
+                "teamid": datasets.Value("int64"),
+                "abbreviation": datasets.Value("string"),
+                "players": [
                     {
-                        "quarter": datasets.Value("int64"),
-                        "game_clock": datasets.Value("float64"),
-                        "shot_clock": datasets.Value("float64"),
-                        "ball_coordinates": {
-                            "x": datasets.Value("float64"),
-                            "y": datasets.Value("float64"),
-                            "z": datasets.Value("float64")
-                        },
-                        "player_coordinates": [
-                            {
-                                "teamid": datasets.Value("int32"),
-                                "playerid": datasets.Value("int32"),
-                                "x": datasets.Value("float64"),
-                                "y": datasets.Value("float64"),
-                                "z": datasets.Value("float64")
-                            }
-                        ]
+                    "lastname": datasets.Value("string"),
+                    "firstname": datasets.Value("string"),
+                    "playerid": datasets.Value("int64"),
+                    "jersey": datasets.Value("string"),
+                    "position": datasets.Value("string")
+                    }
+                ]
+            },
+            "home": {
+                "name": datasets.Value("string"),
+                "teamid": datasets.Value("int64"),
+                "abbreviation": datasets.Value("string"),
+                "players": [
+                    {
+                    "lastname": datasets.Value("string"),
+                    "firstname": datasets.Value("string"),
+                    "playerid": datasets.Value("int64"),
+                    "jersey": datasets.Value("string"),
+                    "position": datasets.Value("string")
                     }
                 ]
             }
-        )
-        
+        }
+
+        if self.config.layout == "game":
+            event_features = {key: features.pop(key) for key in ("event_info", "primary_info", "secondary_info")}
+            features["events"] = [
+                {
+                    **event_features,
+                    "frame_start": datasets.Value("int64"),
+                    "frame_end": datasets.Value("int64"),
+                    "frame_index": [datasets.Value("int32")]
+                }
+            ]
+            features["timestamps"] = datasets.Sequence(datasets.Value("int64"))
+            features["clock"] = datasets.Array2D(shape=(None, 3), dtype="float32")
+            features["positions"] = datasets.Array3D(shape=(None, N_SLOTS, 3), dtype="float32")
+            features["lineups"] = datasets.Array3D(shape=(None, N_PLAYERS, 2), dtype="int32")
+            features["lineup_index"] = datasets.Sequence(datasets.Value("int32"))
+        elif self.config.layout == "tensor":
+            features["positions"] = datasets.Array3D(shape=(None, N_SLOTS, 3), dtype="float32")
+            features["clock"] = datasets.Array2D(shape=(None, 3), dtype="float32")
+            features["player_table"] = datasets.Array2D(shape=(N_PLAYERS, 2), dtype="int32")
+        else:
+            features["moments"] = [
+                {
+                    "quarter": datasets.Value("int64"),
+                    "game_clock": datasets.Value("float64"),
+                    "shot_clock": datasets.Value("float64"),
+                    "ball_coordinates": {
+                        "x": datasets.Value("float64"),
+                        "y": datasets.Value("float64"),
+                        "z": datasets.Value("float64")
+                    },
+                    "player_coordinates": [
+                        {
+                            "teamid": datasets.Value("int32"),
+                            "playerid": datasets.Value("int32"),
+                            "x": datasets.Value("float64"),
+                            "y": datasets.Value("float64"),
+                            "z": datasets.Value("float64")
+                        }
+                    ]
+                }
+            ]
+
+        # speed and direction computed at 25 Hz before resampling
+        if self.config.resampled and self.config.layout == "moments":
+            moment = features["moments"][0]
+            for coordinates in (moment["ball_coordinates"], moment["player_coordinates"][0]):
+                coordinates.update({field: datasets.Value("float64") for field in ("speed", "dir_x", "dir_y")})
+        elif self.config.resampled:
+            features["speed"] = datasets.Array2D(shape=(None, N_SLOTS), dtype="float32")
+            features["direction"] = datasets.Array3D(shape=(None, N_SLOTS, 2), dtype="float32")
+
+        if self.config.quantize:
+            del features["positions"], features["clock"]
+            features["positions_q"] = datasets.Sequence(datasets.Value("int16"))
+            features["clock_q"] = datasets.Sequence(datasets.Value("int32"))
+
         return datasets.DatasetInfo(
             # This is the description that will appear on the datasets page.
             description=_DESCRIPTION,
             # This defines the different columns of the dataset and their types
-            features=features,  # Here we define them above because they are different between the two configurations
+            features=datasets.Features(features),  # Here we define them above because they are different between the two configurations
             # If there's a common (input, target) tuple from the features, uncomment supervised_keys line below and
             # specify them. They'll be used if as_supervised=True in builder.as_dataset.
             # supervised_keys=("sentence", "label"),
@@ -193,135 +266,171 @@ class NbaTracking(datasets.GeneratorBasedBuilder):
             citation=_CITATION,
         )
 
+    def _game_shards(self, pbp_fingerprint):
+        if not self.config.cache_games:
+            return None
+        # examples embed PBP fields, so a different PBP file means different examples
+        options = {
+            "frame_rate": self.config.frame_rate, "dedupe_frames": self.config.dedupe_frames, "quantize": self.config.quantize,
+            "pbp": pbp_fingerprint
+        }
+        return GameShards(self.config.game_cache_dir, self.info.features, self.config.layout, options, self.config.game_cache_max_bytes)
+
+    def _script_manifest(self, dl_manager):
+        # relative paths resolve next to the script, in the repository or on the Hub, not in the modules cache
+        try:
+            return dl_manager.download(MANIFEST_FILE)
+        except FileNotFoundError:
+            return None
+
     def _split_generators(self, dl_manager):
-        random.seed(9)
-        items = random.sample(self.items, self.config.samples)
+        items = self.config.sampled_games(None if self.config.manifest_path else self._script_manifest(dl_manager))
+        names = [game['name'][:-3] for game in items]
+        mirror = self.config.mirror
+        pbp_path = dl_manager.download(mirror_url(mirror, PBP_FILENAME) if mirror else _PBP_URL)
+        pbp_fingerprint = file_fingerprint(pbp_path) if self.config.cache_games else None
+
+        # games with a shard from an earlier build are read back instead of downloaded
+        shards = self._game_shards(pbp_fingerprint)
+        cached = {name for name in names if shards is not None and name in shards}
+        if shards is not None:
+            shards.evict(keep=cached)
         
         _URLS = {}
         for game in items:
           name = game['name'][:-3]
-          _URLS[name] = _URL + "/" + name + ".7z"
+          if name in cached:
+            continue
+          _URLS[name] = mirror_url(mirror, name + ".7z") if mirror else _URL + "/" + name + ".7z"
             
         urls = _URLS
         
-        data_dir = dl_manager.download_and_extract(urls)
-        
-        all_file_paths = {}
-        for key, directory_path in data_dir.items():
-            all_file_paths[key] = os.path.join(directory_path, os.listdir(directory_path)[0])
+        # archives are only downloaded here; _generate_examples verifies and extracts them in a process pool
+        archive_paths = dl_manager.download(urls)
+        checksums = [(game.get('size'), game.get('sha256')) for game in items]
+
+        # build the index once in the parent process; num_proc workers forked from it share it read-only
+        load_pbp_index(pbp_path)
             
         return [
             datasets.SplitGenerator(
                 name=datasets.Split.TRAIN,
                 # These kwargs will be passed to _generate_examples
+                # filepaths is a list so that `num_proc` shards the build per game
                 gen_kwargs={
-                    "filepaths": all_file_paths,
+                    "filepaths": [archive_paths.get(name) for name in names],
+                    "checksums": checksums,
+                    "names": names,
+                    # local mirror files are downloaded in place, so archives are extracted into the builder's cache
+                    "extract_dir": os.path.join(self._cache_downloaded_dir, "extracted_games"),
+                    "pbp_path": pbp_path,
+                    "pbp_fingerprint": pbp_fingerprint,
                     "split": "train",
                 }
             )
         ]
 
-   
-    def _generate_examples(self, filepaths, split):
-        pbp_out = datasets.DownloadManager().download_and_extract(_PBP_URL)
-        pbp = pd.read_csv(pbp_out)
-        
-        moment_id = 0
+    def _prepare_split(self, split_generator, *args, **kwargs):
+        # each of the num_proc shard workers runs its own extraction pool
+        split_generator.gen_kwargs["num_proc"] = min(kwargs.get("num_proc") or 1, len(split_generator.gen_kwargs["filepaths"]) or 1)
+        return super()._prepare_split(split_generator, *args, **kwargs)
+
+    def _generate_examples(self, filepaths, pbp_path, split, checksums=None, extract_dir=None, names=None, num_proc=None,
+                           pbp_fingerprint=None):
+        pbp = load_pbp_index(pbp_path)
+        stats = PipelineStats("build", self.config.stats_path) if self.config.stats_path else None
+        checksums = checksums or [(None, None)] * len(filepaths)
+        names = names or [None] * len(filepaths)
+        shards = self._game_shards(pbp_fingerprint) if any(names) else None
+        # games cached at split time have no file
+        archives = [(path, size, sha256) for path, (size, sha256) in zip(filepaths, checksums) if path is not None]
         
-        for game_title, link in filepaths.items():
-            with open(link, encoding="utf-8") as fp:
-                game = json.load(fp)
-                game_id = game["gameid"]
-                game_date = game["gamedate"] 
-
-                for event in game["events"]:
-                    event_id = event["eventId"]
-
-                    event_row = pbp.loc[(pbp.GAME_ID == int(game_id)) & (pbp.EVENTNUM == int(event_id))]
-                    if len(event_row) != 1:
-                        continue
-
-                    event_type = event_row["EVENTMSGTYPE"].item()
-                    
-                    event_home_desc = event_row["HOMEDESCRIPTION"].item()
-                    
-                    event_away_desc = event_row["VISITORDESCRIPTION"].item()
-                    
-                    primary_home_away = home_away_event_conversion(event_row["PERSON1TYPE"])
-                    primary_player_id = event_row["PLAYER1_ID"].item()
-                    primary_team_id = event_row["PLAYER1_TEAM_ID"].item()
-                    
-                    secondary_home_away = home_away_event_conversion(event_row["PERSON2TYPE"])
-                    secondary_player_id = event_row["PLAYER2_ID"].item()
-                    secondary_team_id = event_row["PLAYER2_TEAM_ID"].item()
-                    
-                    poss_team_id = identify_offense(event_row)
-                    
-                    visitor_name = event['visitor']['name']
-                    visitor_team_id = event['visitor']['teamid']
-                    visitor_abbrev = event['visitor']['abbreviation']
-                    visitor_players = event['visitor']['players']
-
-                    home_name = event['home']['name']
-                    home_team_id = event['home']['teamid']
-                    home_abbrev = event['home']['abbreviation']
-                    home_players = event['home']['players']
-
-                    moments = [
-                        {
-                            "quarter": moment[0],
-                            "game_clock": moment[2],
-                            "shot_clock": moment[3],
-                            "ball_coordinates": {
-                                "x": moment[5][0][2],
-                                "y": moment[5][0][3],
-                                "z": moment[5][0][4]
-                            },
-                            "player_coordinates": [
-                                {
-                                    "teamid": i[0], 
-                                    "playerid": i[1], 
-                                    "x": i[2], 
-                                    "y": i[3], 
-                                    "z": i[4]
-                                } for i in moment[5][1:]
-                            ]
-                        } for moment in event["moments"]
-                    ]
+        # .7z archives are extracted ahead in worker processes while earlier games are generated
+        links = extract_ahead(archives, self.config.extract_workers or shard_extract_workers(num_proc), extract_dir)
+        for path, name in zip(filepaths, names):
+            if path is None:
+                examples = shards.read(name)
+                if stats is not None:
+                    stats.enter(name)
+                    examples = stats.timed(examples, "game_cache")
+                for example in examples:
+                    yield self._example_key(example), example
+                if stats is not None:
+                    stats.finish()
+                continue
+
+            # events are decoded one at a time so memory stays bounded by a single event
+            with SportVuGame(next(links)) as game:
+                if stats is not None:
+                    stats.enter(game.gameid)
+
+                examples = self._game_examples(game, pbp, stats)
+                if shards is not None and name is not None:
+                    examples = shards.write_through(name, examples)
+                for example in examples:
+                    yield self._example_key(example), example
+
+                if stats is not None:
+                    stats.add(bytes_read=game.bytes_read)
+                    stats.finish()
+
+    def _example_key(self, example):
+        if self.config.layout == "game":
+            return example["gameid"]
+        # keyed by game and event so that keys are deterministic and unique across shards
+        return f"{example['gameid']}_{example['event_info']['id']}"
+
+    def _game_examples(self, game, pbp, stats=None):
+        if self.config.layout == "game":
+            yield self._game_example(game, pbp, stats)
+            return
+        for event, example in self._event_examples(game, pbp, stats):
+            start = time.perf_counter()
+            fields = frame_fields(event["moments"], self.config.layout, self.config.frame_rate, self.config.dedupe_frames)
+            example.update(quantize_arrays(fields) if self.config.quantize else fields)
+            if stats is not None:
+                stats.add_stage(self.config.layout, time.perf_counter() - start)
+            yield example
+
+    def _game_example(self, game, pbp, stats=None):
+        # one example per game: the deduplicated frame table plus each event as a range of its rows
+        table = GameFrameTable()
+        events = []
+        example = None
+        for event, example in self._event_examples(game, pbp, stats):
+            start = time.perf_counter()
+            if self.config.resampled:
+                frames = resample_frames(frames_to_arrays(event["moments"]), self.config.frame_rate, self.config.dedupe_frames)
+                del frames["player_table"]
+                table.add_frames(frames)
+            else:
+                table.add(event["moments"])
+            if stats is not None:
+                stats.add_stage("game", time.perf_counter() - start)
+            events.append({
+                "event_info": example["event_info"],
+                "primary_info": example["primary_info"],
+                "secondary_info": example["secondary_info"]
+            })
+
+        start = time.perf_counter()
+        frames = table.finish()
+        frames["lineups"], frames["lineup_index"] = compact_players(frames.pop("players"))
+        for number, event in enumerate(events):
+            event["frame_start"], event["frame_end"], event["frame_index"] = table.event_range(number)
+        if self.config.quantize:
+            frames = quantize_arrays(frames)
+        if stats is not None:
+            stats.add_stage("game", time.perf_counter() - start)
+
+        return {
+            "gameid": game.gameid,
+            "gamedate": game.gamedate,
+            "visitor": example["visitor"] if example else None,
+            "home": example["home"] if example else None,
+            "events": events,
+            **frames
+        }
 
-                    moment_id += 1
-                                
-                    yield moment_id, {
-                        "gameid": game_id,
-                        "gamedate": game_date,
-                        "event_info": {
-                            "id": event_id,
-                            "type": event_type,
-                            "possession_team_id": poss_team_id,
-                            "desc_home": event_home_desc,
-                            "desc_away": event_away_desc
-                        },
-                        "primary_info": {
-                            "team": primary_home_away,
-                            "player_id": primary_player_id,
-                            "team_id": primary_team_id
-                                },
-                        "secondary_info": {
-                            "team": secondary_home_away,
-                            "player_id": secondary_player_id,
-                            "team_id": secondary_team_id
-                        },
-                        "visitor": {
-                            "name": visitor_name,
-                            "teamid": visitor_team_id,
-                            "abbreviation": visitor_abbrev,
-                            "players": visitor_players
-                        },
-                        "home": {
-                            "name": home_name,
-                            "teamid": home_team_id,
-                            "abbreviation": home_abbrev,
-                            "players": home_players
-                        },
-                        "moments": moments
-                    }
\ No newline at end of file
+    def _event_examples(self, game, pbp, stats=None):
+        return event_examples(game, pbp, stats)
@@ -0,0 +1,131 @@
+"""Overlapped archive-to-filtered-events pipeline.
+
+Instead of building the whole dataset and then running filter_candidate_events over it, games flow through
+bounded stages:
+  - a thread verifies and extracts archives ahead (archives.extract_ahead, decompression in worker processes)
+    and hands JSON paths over through a queue of `prefetch` games
+  - a process pool parses each game, joins the PBP, keeps the candidate events and runs filter_candidate_events
+    and the turnover labels on them (process_game), with at most `workers` games in flight
+Results come back in input order as soon as the first game is done, and the bounded queue and in-flight limit
+stop extraction from running ahead of a slow consumer.
+
+    for event in pipeline_events(archive_paths, pbp_path):
+        ...
+"""
+
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from .archives import extract_ahead
+from .dataset_operations import filter_candidate_events, is_candidate_event
+from .examples import event_examples, frame_fields
+from .play_by_play import load_pbp_index
+from .sportvu_json import SportVuGame
+from .turnover_labels import DEFAULT_WINDOW, FRAME_COLUMNS, label_events
+
+_DONE = object()
+
+
+def process_game(path, pbp_path, layout="moments", find_screens=True, windows=(DEFAULT_WINDOW,), outcomes=("made_shot",),
+                 frame_rate=None, dedupe_frames=False):
+    """
+    This function takes an extracted game file and the season PBP CSV.
+    It returns the game's candidate events processed by filter_candidate_events, in the "moments" or "tensor" event layout
+    (resampled with frame_rate / dedupe_frames as in the builder options),
+    with turnover labels (see turnover_labels.label_events) checked against every event of the game; windows=None skips labeling.
+    Only candidate events are converted, so memory holds the candidates of one game.
+    """
+    pbp = load_pbp_index(pbp_path)
+    rows, candidates = [], []
+    with SportVuGame(path) as game:
+        for event, example in event_examples(game, pbp):
+            info = example["event_info"]
+            moments = event["moments"]
+            if moments:
+                rows.append((game.gameid, moments[0][0], moments[0][2], info["type"], info["possession_team_id"], info["id"]))
+            if not is_candidate_event(example):
+                continue
+            example.update(frame_fields(moments, layout, frame_rate, dedupe_frames))
+            candidates.append(example)
+
+    events = list(filter_candidate_events(candidates, find_screens=find_screens))
+    if windows:
+        # candidates are timed at their event frame, every other event at its first frame
+        event_frames = {event["event_info"]["id"]: event["event_info"] for event in events}
+        rows = [
+            row if row[-1] not in event_frames else row[:1] + (event_frames[row[-1]]["quarter"], event_frames[row[-1]]["game_clock"]) + row[3:]
+            for row in rows
+        ]
+        table = pd.DataFrame(rows, columns=FRAME_COLUMNS).astype({"game_id": str, "quarter": "int64", "game_clock": "float64"})
+        label_events(events, table, windows, outcomes)
+    return events
+
+
+def pipeline_events(archives, pbp_path, workers=None, extract_workers=None, prefetch=2, **options):
+    """
+    This function takes game archives (paths, (path, size, sha256) tuples, or already extracted game files) and the
+    season PBP CSV, and yields the processed candidate events of every game in input order (see process_game for `options`).
+    A pool of processes processes games while a thread keeps up to `prefetch` extracted games queued, extracting them in
+    `extract_workers` processes. Both pools share one budget of `workers` processes (the CPU count when not given):
+    extract_workers defaults to a quarter of it and the game pool gets the rest.
+    """
+    archives = [(archive, None, None) if isinstance(archive, str) else tuple(archive) for archive in archives]
+    budget = workers or os.cpu_count() or 1
+    extract_workers = extract_workers or max(1, budget // 4)
+    workers = max(1, budget - extract_workers)
+    paths = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                paths.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def extract():
+        try:
+            for path in extract_ahead(archives, extract_workers):
+                if not put(path):
+                    return
+        except BaseException as error:
+            put(error)
+        else:
+            put(_DONE)
+
+    # warmed before the pool forks so that workers share the index
+    load_pbp_index(pbp_path)
+    extractor = threading.Thread(target=extract, name="extract-archives", daemon=True)
+    extractor.start()
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            pending = deque()
+            exhausted = False
+            while True:
+                # submit extracted games while there is room; only block when nothing is in flight
+                while not exhausted and len(pending) < workers:
+                    try:
+                        item = paths.get(block=not pending, timeout=None if not pending else 0.05)
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        exhausted = True
+                    elif isinstance(item, BaseException):
+                        raise item
+                    else:
+                        pending.append(pool.submit(process_game, item, pbp_path, **options))
+                if not pending:
+                    return
+                if not pending[0].done() and not exhausted and len(pending) < workers:
+                    wait(list(pending), timeout=0.05, return_when=FIRST_COMPLETED)
+                    continue
+                yield from pending.popleft().result()
+    finally:
+        stop.set()
@@ -0,0 +1,162 @@
+"""Play-by-play stage of the nba_tracking_data_15_16 builder.
+
+The season PBP CSV is parsed once, enriched with possession and home/away attribution in a single
+vectorized pass, persisted next to the download as Parquet so later builds skip both steps, and
+wrapped in a PbpIndex keyed by (GAME_ID, EVENTNUM) for constant-time lookups.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+PBP_URL = "https://github.com/sumitrodatta/nba-alt-awards/raw/main/Historical/PBP%20Data/2015-16_pbp.csv"
+
+# bump when the cached columns or their dtypes change
+PBP_CACHE_VERSION = 2
+
+PBP_COLUMNS = [
+    "GAME_ID",
+    "EVENTNUM",
+    "EVENTMSGTYPE",
+    "HOMEDESCRIPTION",
+    "VISITORDESCRIPTION",
+    "PERSON1TYPE",
+    "PLAYER1_ID",
+    "PLAYER1_TEAM_ID",
+    "PERSON2TYPE",
+    "PLAYER2_ID",
+    "PLAYER2_TEAM_ID",
+]
+
+# EVENTMSGTYPE values whose PLAYER1 is on offense: made shot, missed shot, free throw, rebound, turnover
+OFFENSE_EVENT_TYPES = [1, 2, 3, 4, 5]
+FOUL_EVENT_TYPE = 6
+
+# PERSONxTYPE codes
+HOME_PERSON_TYPE = 4
+AWAY_PERSON_TYPE = 5
+
+# columns added by attribute_possession
+ATTRIBUTION_COLUMNS = ["POSSESSION_TEAM_ID", "PRIMARY_TEAM", "SECONDARY_TEAM", "POSSESSION_SEQUENCE"]
+_LABEL_COLUMNS = ["PRIMARY_TEAM", "SECONDARY_TEAM"]
+
+_indexes = {}
+
+
+def home_away_labels(person_type):
+    """Maps a PERSONxTYPE column to 'home' / 'away' labels (None for anything else)."""
+    person_type = person_type.to_numpy(dtype=float)
+    labels = np.full(len(person_type), None, dtype=object)
+    labels[person_type == HOME_PERSON_TYPE] = "home"
+    labels[person_type == AWAY_PERSON_TYPE] = "away"
+    return labels
+
+
+def attribute_possession(pbp):
+    """
+    This function takes the season PBP DataFrame and adds, in one vectorized pass over all rows:
+      - POSSESSION_TEAM_ID: team on offense (PLAYER1's team for shots, free throws, rebounds, turnovers and offensive fouls,
+        PLAYER2's team for other fouls, NaN otherwise)
+      - PRIMARY_TEAM / SECONDARY_TEAM: 'home' / 'away' labels of PLAYER1 / PLAYER2
+      - POSSESSION_SEQUENCE: per-game possession counter, incremented each time the (forward-filled) possession team changes;
+        0 before the first attributed possession of a game
+    It returns the enriched DataFrame in (GAME_ID, EVENTNUM) order.
+    """
+    pbp = pbp.sort_values(["GAME_ID", "EVENTNUM"], kind="stable").reset_index(drop=True)
+
+    event_type = pbp["EVENTMSGTYPE"].to_numpy()
+    offensive_foul = (
+        pbp["HOMEDESCRIPTION"].astype(str).str.contains("OFF.FOUL", regex=False).to_numpy()
+        | pbp["VISITORDESCRIPTION"].astype(str).str.contains("OFF.FOUL", regex=False).to_numpy()
+    )
+    pbp["POSSESSION_TEAM_ID"] = np.select(
+        [np.isin(event_type, OFFENSE_EVENT_TYPES), offensive_foul, event_type == FOUL_EVENT_TYPE],
+        [pbp["PLAYER1_TEAM_ID"].to_numpy(dtype=float), pbp["PLAYER1_TEAM_ID"].to_numpy(dtype=float),
+         pbp["PLAYER2_TEAM_ID"].to_numpy(dtype=float)],
+        default=np.nan,
+    )
+
+    pbp["PRIMARY_TEAM"] = home_away_labels(pbp["PERSON1TYPE"])
+    pbp["SECONDARY_TEAM"] = home_away_labels(pbp["PERSON2TYPE"])
+
+    current_team = pbp.groupby("GAME_ID")["POSSESSION_TEAM_ID"].ffill()
+    previous_team = current_team.groupby(pbp["GAME_ID"]).shift()
+    changed = current_team.notna() & (current_team != previous_team)
+    pbp["POSSESSION_SEQUENCE"] = changed.astype(np.int64).groupby(pbp["GAME_ID"]).cumsum()
+
+    return pbp
+
+
+def cache_path(csv_path):
+    """Returns the Parquet cache location for a downloaded PBP CSV."""
+    return f"{csv_path}.v{PBP_CACHE_VERSION}.parquet"
+
+
+def read_pbp(csv_path):
+    """
+    This function takes the path of the season PBP CSV.
+    It returns the attributed PBP DataFrame (see attribute_possession), reading the Parquet cache when it exists
+    and writing it otherwise.
+    """
+    parquet_path = cache_path(csv_path)
+    if os.path.exists(parquet_path):
+        return pd.read_parquet(parquet_path)
+
+    pbp = attribute_possession(pd.read_csv(csv_path, usecols=lambda column: column in PBP_COLUMNS))
+    tmp_path = parquet_path + ".tmp"
+    pbp.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+    return pbp
+
+
+class PbpIndex:
+    """
+    Read-only view of the PBP table keyed by (GAME_ID, EVENTNUM).
+    Keys that occur more than once are left out of the index, matching the old behaviour of skipping ambiguous rows.
+    """
+
+    def __init__(self, pbp):
+        self.frame = pbp.reset_index(drop=True)
+        self._columns = {column: self.frame[column].to_numpy() for column in self.frame.columns}
+        for column in _LABEL_COLUMNS:
+            # string columns may come back from Parquet with NaN for missing labels
+            labels = self._columns[column].astype(object)
+            labels[pd.isna(labels)] = None
+            self._columns[column] = labels
+
+        game_ids = self._columns["GAME_ID"].astype(np.int64)
+        event_nums = self._columns["EVENTNUM"].astype(np.int64)
+        keys = list(zip(game_ids.tolist(), event_nums.tolist()))
+        counts = pd.Series(keys, dtype=object).value_counts()
+        duplicated = set(counts.index[counts.to_numpy() > 1])
+        self._rows = {key: row for row, key in enumerate(keys) if key not in duplicated}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def row_number(self, game_id, event_num):
+        """Returns the position of the (game_id, event_num) row, or None when it is missing or ambiguous."""
+        return self._rows.get((int(game_id), int(event_num)))
+
+    def value(self, row, column):
+        """Returns a single cell as a plain Python value (as Series.item() would)."""
+        value = self._columns[column][row]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def lookup(self, game_id, event_num):
+        """Returns the (game_id, event_num) row as a dict of plain Python values, or None."""
+        row = self.row_number(game_id, event_num)
+        if row is None:
+            return None
+        return {column: self.value(row, column) for column in self._columns}
+
+
+def load_pbp_index(csv_path):
+    """Returns the PbpIndex for `csv_path`, building it at most once per process."""
+    if csv_path not in _indexes:
+        _indexes[csv_path] = PbpIndex(read_pbp(csv_path))
+    return _indexes[csv_path]
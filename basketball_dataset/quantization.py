@@ -0,0 +1,104 @@
+"""Fixed-point, delta-encoded storage of tracking arrays.
+
+Court positions only need about 0.01 ft and SportVU clocks have 0.01 s resolution, so the array layouts can store
+  - positions_q: int16 frames x 11 x 3 values, positions in 0.01 ft
+  - clock_q: int32 frames x 3 values, quarter, game_clock and shot_clock in 0.01 units
+instead of float32 positions and clock, each delta-encoded along the frame axis: the first frame holds the value and
+every later frame the change since the last frame where the value was present. Missing values (players off the
+table, a missing ball or shot clock) are the dtype's minimum, so decoding is one cumulative sum. Decoded values are
+within half a unit of the originals.
+Both are stored flattened to one dimension: nested Arrow lists keep an offset per (x, y, z) triple, which would
+cost more than the narrower values save.
+
+    example.update(quantize_arrays({"positions": positions, "clock": clock}))
+    dequantize(example)["positions"]                   # float32 again
+    dataset.with_transform(decode_quantized)           # decodes rows / batches on read
+"""
+
+import numpy as np
+
+POSITION_SCALE = 100
+CLOCK_SCALE = 100
+
+# field name -> (encoded name, integer dtype, scale, per-frame shape: ball + 10 player slots x (x, y, z), or the 3 clocks)
+QUANTIZED_FIELDS = {
+    "positions": ("positions_q", np.int16, POSITION_SCALE, (11, 3)),
+    "clock": ("clock_q", np.int32, CLOCK_SCALE, (3,)),
+}
+
+
+def _missing(dtype):
+    return np.iinfo(dtype).min
+
+
+def delta_encode(values, scale, dtype):
+    """
+    This function takes a float array of shape frames x ... (NaN where missing), a scale and an integer dtype.
+    It returns the delta-encoded fixed-point values, see the module docstring.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    present = ~np.isnan(values)
+    fixed = np.where(present, np.rint(np.where(present, values, 0) * scale), 0).astype(np.int64)
+    if len(values) == 0:
+        return fixed.astype(dtype)
+
+    # last present value before each frame, 0 before the first one
+    frames = np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1))
+    last = np.maximum.accumulate(np.where(present, frames, -1), axis=0)
+    previous = np.zeros_like(fixed)
+    previous[1:] = np.where(last[:-1] >= 0, np.take_along_axis(fixed, np.maximum(last[:-1], 0), axis=0), 0)
+
+    limit = np.iinfo(dtype).max
+    deltas = np.clip(fixed - previous, -limit, limit)
+    return np.where(present, deltas, _missing(dtype)).astype(dtype)
+
+
+def delta_decode(encoded, scale, dtype=np.float32):
+    """Inverse of delta_encode: returns the values as `dtype`, NaN where missing."""
+    encoded = np.asarray(encoded)
+    missing = encoded == _missing(encoded.dtype)
+    fixed = np.cumsum(np.where(missing, 0, encoded), axis=0, dtype=np.int64)
+    return np.where(missing, np.nan, fixed / scale).astype(dtype)
+
+
+def quantize_arrays(arrays):
+    """
+    This function takes a dict of arrays with float 'positions' and / or 'clock' (tensor or game layout fields)
+    and returns it with them replaced by their flattened encoded positions_q / clock_q; other entries are kept.
+    """
+    quantized = {}
+    for key, values in arrays.items():
+        if key in QUANTIZED_FIELDS:
+            name, dtype, scale, _ = QUANTIZED_FIELDS[key]
+            quantized[name] = delta_encode(values, scale, dtype).reshape(-1)
+        else:
+            quantized[key] = values
+    return quantized
+
+
+def decode_field(key, encoded):
+    """Returns the float32 'positions' or 'clock' array of a stored positions_q / clock_q value."""
+    _, dtype, scale, shape = QUANTIZED_FIELDS[key]
+    return delta_decode(np.asarray(encoded, dtype=dtype).reshape((-1,) + shape), scale)
+
+
+def dequantize(example):
+    """
+    This function takes an example or event with positions_q / clock_q and replaces them with float32 positions / clock.
+    Examples without them are returned unchanged. Operates in-place and returns the example.
+    """
+    for key, (name, _, _, _) in QUANTIZED_FIELDS.items():
+        if name in example:
+            example[key] = decode_field(key, example.pop(name))
+    return example
+
+
+def decode_quantized(batch):
+    """
+    Dataset.with_transform / set_transform function decoding positions_q / clock_q of a batch (one array per row),
+    so rows read from a quantized "tensor" build look like the float layout.
+    """
+    for key, (name, _, _, _) in QUANTIZED_FIELDS.items():
+        if name in batch:
+            batch[key] = [decode_field(key, values) for values in batch.pop(name)]
+    return batch
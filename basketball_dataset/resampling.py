@@ -0,0 +1,169 @@
+"""Build-time frame deduplication and resampling of SportVU events.
+
+SportVU runs at 25 Hz and keeps sending frames while the game clock is stopped, so an event holds runs of frames
+with the same game_clock. resample_frames works on one event's frames_to_arrays output:
+  1. players are aligned to one player table and speed / direction are computed at the full 25 Hz rate
+  2. with dedupe, frames repeating the previous frame's (quarter, game_clock) are dropped
+  3. with a rate, positions, kinematics and clocks are linearly interpolated onto a `rate` Hz grid
+Grid times are multiples of 1 / rate on the elapsed game clock (on the wall clock without dedupe), so overlapping
+events resample to the same frames and the "game" layout still stores each of them once; every event also keeps
+its first and last frame.
+
+    frames = resample_frames(frames_to_arrays(event["moments"]), rate=5)
+    frames["positions"].shape                          # (about a fifth of the frames, 11, 3)
+"""
+
+import numpy as np
+
+from .tracking_arrays import CLOCK_GAME_CLOCK, CLOCK_QUARTER, align_players
+
+SOURCE_RATE = 25
+
+# larger than any game_clock, so one float key orders (quarter, elapsed game time)
+_QUARTER_SPAN = 1e4
+
+
+def _centered_mean(values, window):
+    """
+    This function takes an array of shape frames x ... and returns its centered moving average over `window` frames.
+    Frames whose window runs past either end of the event, or contains a NaN, are NaN.
+    """
+    smoothed = np.full(values.shape, np.nan)
+    if window < 1 or len(values) < window:
+        return smoothed
+    windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)
+    start = (window - 1) // 2
+    smoothed[start:start + windows.shape[0]] = windows.mean(axis=-1)
+    return smoothed
+
+
+def compute_kinematics(xy, fps=25, smooth_window=None):
+    """
+    This function takes court positions of shape frames x objects x 2 (NaN where an object is not on court)
+    and computes, for every object across all frames at once:
+      - velocity (frames x objects x 2, ft/s) and speed (frames x objects)
+      - direction: unit vector of the displacement (0 when the object did not move)
+      - acceleration (frames x objects x 2, ft/s^2)
+    Quantities that need a previous frame the object was not present in (including the first frame) are NaN.
+    With `smooth_window`, the same quantities computed from centered moving-average positions are added with a "_smooth" suffix.
+    It returns a dict of arrays.
+    """
+    xy = np.asarray(xy, dtype=np.float64)
+    displacement = np.empty_like(xy)
+    displacement[0] = np.nan
+    np.subtract(xy[1:], xy[:-1], out=displacement[1:])
+    dx, dy = displacement[..., 0], displacement[..., 1]
+    distance = np.sqrt(dx * dx + dy * dy)
+
+    velocity = displacement * fps
+    speed = distance * fps
+    # objects that did not move get a zero direction; NaN distances stay NaN
+    with np.errstate(invalid="ignore"):
+        direction = displacement / np.where(distance > 0, distance, np.inf)[..., None]
+
+    acceleration = np.empty_like(xy)
+    acceleration[0] = np.nan
+    np.subtract(velocity[1:], velocity[:-1], out=acceleration[1:])
+    acceleration *= fps
+
+    kinematics = {
+        "velocity": velocity,
+        "speed": speed,
+        "direction": direction,
+        "acceleration": acceleration,
+    }
+    if smooth_window:
+        smoothed = compute_kinematics(_centered_mean(xy, smooth_window), fps=fps)
+        kinematics.update({name + "_smooth": values for name, values in smoothed.items()})
+    return kinematics
+
+
+def duplicate_clock_mask(clock):
+    """Returns a bool (frames,) mask of the frames whose quarter and game_clock equal the previous frame's."""
+    clock = np.asarray(clock)
+    repeated = np.zeros(len(clock), dtype=bool)
+    repeated[1:] = (clock[1:, CLOCK_QUARTER] == clock[:-1, CLOCK_QUARTER]) & (clock[1:, CLOCK_GAME_CLOCK] == clock[:-1, CLOCK_GAME_CLOCK])
+    return repeated
+
+
+def _interpolate(values, left, weight):
+    # exact grid hits take the left frame as is, so a NaN in the next frame does not leak into them
+    weight = weight.reshape((-1,) + (1,) * (values.ndim - 1))
+    blended = values[left] * (1 - weight) + values[np.minimum(left + 1, len(values) - 1)] * weight
+    return np.where(weight == 0, values[left], blended)
+
+
+def resample_frames(frames, rate=None, dedupe=True, source_rate=SOURCE_RATE):
+    """
+    This function takes one event's frames (tracking_arrays.frames_to_arrays output), a target rate in Hz
+    (None keeps every frame) and whether to drop duplicate-clock frames.
+    It returns a dict of per-frame arrays:
+      - timestamps, clock, positions, players as in frames_to_arrays, every frame's players in the slots of player_table
+      - player_table: int32 (10, 2) playerid, teamid
+      - speed: float32 (frames, 11) and direction: float32 (frames, 11, 2), unit vectors, computed at source_rate
+        before any frame is dropped (see compute_kinematics)
+    """
+    positions, player_table = align_players(frames["positions"], frames["players"])
+    if len(positions):
+        kinematics = compute_kinematics(positions[..., :2], fps=source_rate)
+    else:
+        kinematics = {"speed": np.zeros(positions.shape[:2]), "direction": np.zeros(positions.shape[:2] + (2,))}
+    arrays = {
+        "timestamps": np.asarray(frames["timestamps"]),
+        "clock": np.asarray(frames["clock"]),
+        "positions": positions,
+        "speed": kinematics["speed"],
+        "direction": kinematics["direction"],
+    }
+
+    if dedupe and len(arrays["clock"]):
+        keep = ~duplicate_clock_mask(arrays["clock"])
+        arrays = {key: values[keep] for key, values in arrays.items()}
+
+    if rate is not None and rate < source_rate and len(arrays["clock"]) > 1:
+        clock = arrays["clock"].astype(np.float64)
+        if dedupe:
+            # game_clock counts down and is strictly decreasing once repeats are dropped; SportVU clocks have
+            # 0.01 s resolution, rounded back from float32 so frames on the grid are hit exactly
+            time = clock[:, CLOCK_QUARTER] * _QUARTER_SPAN - np.round(clock[:, CLOCK_GAME_CLOCK], 2)
+        else:
+            time = arrays["timestamps"] / 1000
+        time = np.round(time, 3)
+        # one grid per quarter, so an event running into the next quarter does not fill the break
+        quarters = clock[:, CLOCK_QUARTER]
+        grid = [
+            np.arange(np.ceil(start * rate - 1e-6), np.floor(end * rate + 1e-6) + 1) / rate
+            for start, end in (
+                (time[quarters == quarter].min(), time[quarters == quarter].max()) for quarter in np.unique(quarters)
+            )
+        ]
+        # the first and last frames are kept as well: events often end on the frame that matters (a shot in the basket)
+        grid = np.unique(np.r_[time[0], np.round(np.concatenate(grid), 3), time[-1]])
+        left = np.clip(np.searchsorted(time, grid, side="right") - 1, 0, len(time) - 1)
+        step = time[np.minimum(left + 1, len(time) - 1)] - time[left]
+        weight = np.where(step > 0, (grid - time[left]) / np.where(step > 0, step, 1), 0)
+        # positions snap to the grid within float error
+        weight = np.where(np.isclose(weight, 0, atol=1e-6), 0, weight)
+
+        direction = _interpolate(arrays["direction"], left, weight)
+        norm = np.linalg.norm(direction, axis=-1, keepdims=True)
+        with np.errstate(invalid="ignore"):
+            direction = np.where(norm > 0, direction / np.where(norm > 0, norm, 1), direction)
+        resampled_clock = _interpolate(clock, left, weight)
+        # a frame belongs to the quarter of the frame it starts from
+        resampled_clock[:, CLOCK_QUARTER] = clock[left, CLOCK_QUARTER]
+        resampled_clock[:, CLOCK_GAME_CLOCK:] = np.round(resampled_clock[:, CLOCK_GAME_CLOCK:], 2)
+        arrays = {
+            "timestamps": np.round(_interpolate(arrays["timestamps"].astype(np.float64), left, weight)).astype(np.int64),
+            "clock": resampled_clock,
+            "positions": _interpolate(arrays["positions"], left, weight),
+            "speed": _interpolate(arrays["speed"], left, weight),
+            "direction": direction,
+        }
+
+    present = ~np.isnan(arrays["positions"][:, 1:, 0])
+    arrays["players"] = np.where(present[..., None], player_table, -1).astype(np.int32)
+    arrays["player_table"] = player_table
+    for key in ("clock", "positions", "speed", "direction"):
+        arrays[key] = arrays[key].astype(np.float32)
+    return arrays
@@ -0,0 +1,104 @@
+"""Incremental reader for SportVU game files.
+
+A game file is a single JSON object {"gameid": ..., "gamedate": ..., "events": [...]} that is
+hundreds of MB once decompressed. SportVuGame reads the header fields and then decodes the events
+array one event at a time from the incrementally decoded file, so memory stays bounded by roughly one event.
+"""
+
+import codecs
+import json
+import re
+
+_CHUNK_SIZE = 1 << 20
+
+_EVENTS_PATTERN = re.compile(r'"events"\s*:\s*\[')
+_HEADER_FIELD_PATTERN = r'"{}"\s*:\s*"([^"]*)"'
+
+
+class SportVuGame:
+    """
+    Streaming view of one SportVU game file.
+    `gameid` and `gamedate` are read on open; `events()` yields the raw event dicts in file order.
+
+        with SportVuGame(path) as game:
+            for event in game.events():
+                ...
+    """
+
+    def __init__(self, path, chunk_size=_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        # read bytes and decode them here, so bytes_read counts the file's bytes rather than decoded characters
+        self._fp = open(path, "rb")
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self.bytes_read = 0
+
+        header = self._read_header()
+        self.gameid = self._header_field(header, "gameid")
+        self.gamedate = self._header_field(header, "gamedate")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._fp.close()
+
+    def _fill(self, size):
+        raw = self._fp.read(size)
+        if not raw:
+            # raises on a multi-byte character cut off by the end of the file
+            self._text.decode(b"", final=True)
+            self._eof = True
+            return False
+        self.bytes_read += len(raw)
+        chunk = self._text.decode(raw)
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _read_header(self):
+        while True:
+            match = _EVENTS_PATTERN.search(self._buffer)
+            if match is not None:
+                self._pos = match.end()
+                return self._buffer[:match.start()]
+            if not self._fill(self.chunk_size):
+                raise ValueError(f"{self.path} has no 'events' array")
+
+    def _header_field(self, header, name):
+        match = re.search(_HEADER_FIELD_PATTERN.format(name), header)
+        if match is None:
+            raise ValueError(f"{self.path} has no '{name}' before its 'events' array")
+        return match.group(1)
+
+    def _skip_separators(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n,":
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill(self.chunk_size):
+                return
+
+    def events(self):
+        """Yields each event of the game as a dict, decoding one event at a time."""
+        while True:
+            self._skip_separators()
+            if self._pos >= len(self._buffer):
+                raise ValueError(f"{self.path} ended inside the 'events' array")
+            if self._buffer[self._pos] == "]":
+                return
+            try:
+                event, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # the event is not complete yet: at least double what is buffered before trying again
+                if self._eof or not self._fill(max(self.chunk_size, len(self._buffer) - self._pos)):
+                    raise
+                continue
+            self._pos = end
+            yield event
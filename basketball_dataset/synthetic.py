@@ -0,0 +1,163 @@
+"""Synthetic SportVU games for offline benchmarks.
+
+Writes game files in the SportVU JSON layout read by the builder ({"gameid", "gamedate", "events": [...]},
+each moment [quarter, timestamp, game_clock, shot_clock, None, [[teamid, playerid, x, y, z], ...]]) and a
+matching season PBP CSV. Events are overlapping windows into one continuous feed per game, as in the real
+files. The home team attacks the right basket in the first half and the left one in the second; made shots
+end with the ball in the attacking basket and turnovers start with the ball at PLAYER1, so the whole
+pipeline (PBP join, direction inference, event localization) has something to find.
+
+    python -m basketball_dataset.synthetic --out /tmp/sportvu --games 3 --events 40 --frames 150
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+HOME_TEAM_ID = 1610612737
+VISITOR_TEAM_ID = 1610612738
+GAMEDATE = "2015-10-27"
+FIRST_GAME_ID = 21500001
+PBP_FILENAME = "2015-16_pbp.csv"
+
+# EVENTMSGTYPE mix of the generated events: made shot, missed shot, rebound, turnover, foul
+EVENT_TYPES = (1, 2, 4, 5, 6)
+EVENT_TYPE_WEIGHTS = (0.3, 0.3, 0.2, 0.1, 0.1)
+
+_FRAME_MS = 40
+_BASKETS = {"left": (5.0, 25.0), "right": (89.25, 25.0)}
+# the last frames of a made shot move the ball into the basket
+_SHOT_FRAMES = 10
+
+
+def _team(team_id, abbreviation, first_player_id):
+    players = [
+        {"lastname": f"Player{first_player_id + number}", "firstname": abbreviation, "playerid": first_player_id + number,
+         "jersey": str(number), "position": "G"}
+        for number in range(12)
+    ]
+    return {"name": abbreviation, "teamid": team_id, "abbreviation": abbreviation, "players": players}
+
+
+def _walk(rng, n_frames, n_entities):
+    # bounded random walk on the 94 x 50 court
+    steps = rng.normal(0, 0.3, (n_frames, n_entities, 2))
+    walk = np.cumsum(steps, axis=0) + rng.uniform([0, 0], [94, 50], (n_entities, 2))
+    return np.abs((walk + [94, 50]) % [188, 100] - [94, 50])
+
+
+def generate_game(game_id, events=40, frames=150, overlap=0.5, seed=0):
+    """
+    This function generates one synthetic game.
+    `events` windows of `frames` frames each, consecutive windows sharing `overlap` of their frames.
+    It returns (game, pbp_rows): the game file dict and its PBP rows as dicts keyed by PBP column.
+    """
+    rng = np.random.default_rng([seed, int(game_id)])
+    home = _team(HOME_TEAM_ID, "HOM", 1000 + 100 * (int(game_id) % 1000))
+    visitor = _team(VISITOR_TEAM_ID, "VIS", 2000 + 100 * (int(game_id) % 1000))
+    lineup = [(HOME_TEAM_ID, player["playerid"]) for player in home["players"][:5]]
+    lineup += [(VISITOR_TEAM_ID, player["playerid"]) for player in visitor["players"][:5]]
+
+    step = max(1, int(round(frames * (1 - overlap))))
+    n_frames = step * (events - 1) + frames
+    half = (n_frames + 1) // 2
+    positions = _walk(rng, n_frames, 11)
+    heights = rng.uniform(0, 10, n_frames)
+
+    event_types = rng.choice(EVENT_TYPES, size=events, p=EVENT_TYPE_WEIGHTS)
+    home_primary = rng.random(events) < 0.5
+    for number in range(events):
+        start, end = number * step, number * step + frames
+        first_half = start < half
+        attacking = "right" if home_primary[number] == first_half else "left"
+        slot = 1 if home_primary[number] else 6
+        if event_types[number] == 1:
+            target = np.asarray(_BASKETS[attacking])
+            shot = positions[end - _SHOT_FRAMES:end, 0]
+            positions[end - _SHOT_FRAMES:end, 0] = shot + np.linspace(0, 1, _SHOT_FRAMES)[:, None] * (target - shot)
+        elif event_types[number] == 5:
+            positions[start:start + 5, 0] = positions[start:start + 5, slot]
+
+    moments = []
+    for frame in range(n_frames):
+        quarter = 1 if frame < half else 3
+        game_clock = round(720 - (frame % half) * _FRAME_MS / 1000, 2)
+        shot_clock = round(24 - (frame % 600) * _FRAME_MS / 1000, 2)
+        entities = [[-1, -1, float(positions[frame, 0, 0]), float(positions[frame, 0, 1]), float(heights[frame])]]
+        entities += [
+            [team_id, player_id, float(positions[frame, slot + 1, 0]), float(positions[frame, slot + 1, 1]), 0.0]
+            for slot, (team_id, player_id) in enumerate(lineup)
+        ]
+        moments.append([quarter, 1445990000000 + frame * _FRAME_MS, game_clock, shot_clock, None, entities])
+
+    game_events, pbp_rows = [], []
+    for number in range(events):
+        event_num = number + 1
+        game_events.append({
+            "eventId": str(event_num),
+            "visitor": visitor,
+            "home": home,
+            "moments": moments[number * step:number * step + frames],
+        })
+        primary, secondary = (home, visitor) if home_primary[number] else (visitor, home)
+        event_type = int(event_types[number])
+        primary_home = primary is home
+        # turnovers are steals, so both descriptions are set
+        home_desc = "home play" if primary_home or event_type == 5 else None
+        away_desc = "visitor play" if not primary_home or event_type == 5 else None
+        pbp_rows.append({
+            "GAME_ID": int(game_id),
+            "EVENTNUM": event_num,
+            "EVENTMSGTYPE": event_type,
+            "HOMEDESCRIPTION": home_desc,
+            "VISITORDESCRIPTION": away_desc,
+            "PERSON1TYPE": 4 if primary_home else 5,
+            "PLAYER1_ID": primary["players"][0]["playerid"],
+            "PLAYER1_TEAM_ID": primary["teamid"],
+            "PERSON2TYPE": 5 if primary_home else 4,
+            "PLAYER2_ID": secondary["players"][0]["playerid"],
+            "PLAYER2_TEAM_ID": secondary["teamid"],
+        })
+    return {"gameid": game_id, "gamedate": GAMEDATE, "events": game_events}, pbp_rows
+
+
+def write_games(out_dir, games=3, events=40, frames=150, overlap=0.5, seed=0):
+    """
+    This function writes `games` synthetic game files (see generate_game) and their PBP CSV to `out_dir`.
+    It returns (game_paths, pbp_path).
+    """
+    import pandas as pd
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths, pbp_rows = [], []
+    for number in range(games):
+        game_id = f"{FIRST_GAME_ID + number:010d}"
+        game, rows = generate_game(game_id, events, frames, overlap, seed)
+        path = os.path.join(out_dir, f"{game_id}.json")
+        with open(path, "w") as fp:
+            json.dump(game, fp)
+        paths.append(path)
+        pbp_rows.extend(rows)
+
+    pbp_path = os.path.join(out_dir, PBP_FILENAME)
+    pd.DataFrame(pbp_rows).to_csv(pbp_path, index=False)
+    return paths, pbp_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic SportVU games and a matching PBP CSV.")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--games", type=int, default=3)
+    parser.add_argument("--events", type=int, default=40)
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--overlap", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    paths, pbp_path = write_games(args.out, args.games, args.events, args.frames, args.overlap, args.seed)
+    print(f"wrote {len(paths)} games and {pbp_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""Fixed-shape array representation of SportVU moments.
+
+An event's moments are held as
+  - positions: float32 (frames, 11, 3) x/y/z, slot 0 is the ball and slots 1-10 are the players of the player table
+  - clock: float32 (frames, 3) quarter, game_clock, shot_clock
+  - player_table: int32 (10, 2) playerid, teamid per player slot (-1 for unused slots)
+Players missing from a frame, and a missing ball, are NaN.
+
+GameFrameTable holds the frames of a whole game once each. SportVU events overlap heavily, so the
+"game" layout stores one time-ordered frame table per game and each event as a range into it.
+"""
+
+import numpy as np
+
+from .quantization import QUANTIZED_FIELDS, dequantize
+
+BALL_SLOT = 0
+N_PLAYERS = 10
+N_SLOTS = N_PLAYERS + 1
+
+CLOCK_QUARTER = 0
+CLOCK_GAME_CLOCK = 1
+CLOCK_SHOT_CLOCK = 2
+
+# SportVU marks the ball with teamid and playerid -1
+_BALL_ID = -1
+
+
+def frames_to_arrays(moments):
+    """
+    This function takes the raw `event["moments"]` list of a SportVU game file.
+    It returns a dict of per-frame arrays, keeping each frame's own player order:
+      - timestamps: int64 (frames,) wall-clock milliseconds, unique per frame within a game
+      - clock: float32 (frames, 3)
+      - positions: float32 (frames, 11, 3), slot 0 is the ball
+      - players: int32 (frames, 10, 2) playerid, teamid of slots 1-10 (-1 when a frame has fewer players)
+    """
+    n_frames = len(moments)
+    positions = np.full((n_frames, N_SLOTS, 3), np.nan, dtype=np.float32)
+    players = np.full((n_frames, N_PLAYERS, 2), -1, dtype=np.int32)
+    if n_frames == 0:
+        return {
+            "timestamps": np.zeros(0, dtype=np.int64),
+            "clock": np.zeros((0, 3), dtype=np.float32),
+            "positions": positions,
+            "players": players,
+        }
+
+    timestamps = np.array([moment[1] for moment in moments], dtype=np.int64)
+    # None shot clocks become NaN
+    clock = np.array([[moment[0], moment[2], moment[3]] for moment in moments], dtype=np.float64).astype(np.float32)
+
+    # fast path: every frame is the ball followed by ten players
+    try:
+        entries = np.array([moment[5] for moment in moments], dtype=np.float64)
+    except ValueError:
+        entries = None
+    if entries is not None and entries.shape == (n_frames, N_SLOTS, 5) and (entries[:, 0, 1] == _BALL_ID).all():
+        positions[:] = entries[:, :, 2:5]
+        players[:] = entries[:, 1:, 1::-1]
+        return {"timestamps": timestamps, "clock": clock, "positions": positions, "players": players}
+
+    for frame, moment in enumerate(moments):
+        slot = 1
+        for entry in moment[5]:
+            if entry[0] == _BALL_ID:
+                positions[frame, BALL_SLOT] = entry[2:5]
+            elif slot <= N_PLAYERS:
+                positions[frame, slot] = entry[2:5]
+                players[frame, slot - 1] = (entry[1], entry[0])
+                slot += 1
+    return {"timestamps": timestamps, "clock": clock, "positions": positions, "players": players}
+
+
+def align_players(positions, players):
+    """
+    This function takes per-frame positions (frames, 11, 3) and players (frames, 10, 2) as returned by frames_to_arrays.
+    It returns (positions, player_table) with every frame's players moved to the slots of one player table.
+    The table follows the first frame with the most players; players that never appear in that frame are dropped.
+    """
+    player_table = np.full((N_PLAYERS, 2), -1, dtype=np.int32)
+    if len(positions) == 0:
+        return positions, player_table
+
+    n_present = (players[:, :, 0] != -1).sum(axis=1)
+    player_table[:] = players[int(np.argmax(n_present))]
+    if (players == player_table).all():
+        return positions, player_table
+
+    aligned = np.full_like(positions, np.nan)
+    aligned[:, BALL_SLOT] = positions[:, BALL_SLOT]
+    for slot, player_id in enumerate(player_table[:, 0]):
+        if player_id == -1:
+            continue
+        frames, source_slots = np.nonzero(players[:, :, 0] == player_id)
+        aligned[frames, slot + 1] = positions[frames, source_slots + 1]
+    return aligned, player_table
+
+
+def moments_to_arrays(moments):
+    """
+    This function takes the raw `event["moments"]` list of a SportVU game file.
+    It returns a dict with the 'positions', 'clock' and 'player_table' arrays described in the module docstring.
+    """
+    frames = frames_to_arrays(moments)
+    positions, player_table = align_players(frames["positions"], frames["players"])
+    return {"positions": positions, "clock": frames["clock"], "player_table": player_table}
+
+
+def arrays_to_moments(positions, clock, player_table, speed=None, direction=None):
+    """
+    Inverse of moments_to_arrays: rebuilds the nested-dict 'moments' list of the default layout.
+    With speed (frames, 11) and direction (frames, 11, 2), every ball and player dict also gets 'speed', 'dir_x' and 'dir_y'.
+    """
+    moments = []
+    present = [(slot + 1, int(player_id), int(team_id)) for slot, (player_id, team_id) in enumerate(player_table) if player_id != -1]
+    for frame in range(len(positions)):
+        ball = positions[frame, BALL_SLOT].tolist()
+        ball_coordinates = {"x": ball[0], "y": ball[1], "z": ball[2]}
+        player_coordinates = [
+            {"teamid": team_id, "playerid": player_id, "x": x, "y": y, "z": z, "slot": slot}
+            for slot, player_id, team_id in present
+            for x, y, z in [positions[frame, slot].tolist()]
+            if not np.isnan(x)
+        ]
+        if speed is not None:
+            frame_speed, frame_direction = speed[frame].tolist(), direction[frame].tolist()
+            for coordinate, slot in [(ball_coordinates, BALL_SLOT)] + [(player, player["slot"]) for player in player_coordinates]:
+                coordinate["speed"] = frame_speed[slot]
+                coordinate["dir_x"], coordinate["dir_y"] = frame_direction[slot]
+        for player in player_coordinates:
+            del player["slot"]
+        moments.append({
+            "quarter": int(clock[frame, CLOCK_QUARTER]),
+            "game_clock": float(clock[frame, CLOCK_GAME_CLOCK]),
+            "shot_clock": float(clock[frame, CLOCK_SHOT_CLOCK]),
+            "ball_coordinates": ball_coordinates,
+            "player_coordinates": player_coordinates,
+        })
+    return moments
+
+
+class GameFrameTable:
+    """
+    Accumulates the frames of one game's events, keeping each wall-clock timestamp once.
+    Frames are keyed by timestamp rather than (quarter, game_clock) because the game clock repeats while it is stopped.
+
+        table = GameFrameTable()
+        for event in events:
+            table.add(event["moments"])
+        frames = table.finish()                        # time-ordered, deduplicated arrays
+        start, end, index = table.event_range(0)       # rows of the first event added
+    """
+
+    def __init__(self):
+        self._seen = set()
+        self._chunks = []
+        self._event_timestamps = []
+        self._sorted_timestamps = None
+        self._order = None
+        self._empty = None
+
+    def add(self, moments):
+        """Adds one event's raw moments and returns its position in the order of events added."""
+        return self.add_frames(frames_to_arrays(moments))
+
+    def add_frames(self, frames):
+        """
+        Adds one event's frames as returned by frames_to_arrays, possibly with further per-frame arrays
+        (e.g. resampling.resample_frames output without its player_table), and returns the event's position.
+        """
+        if self._empty is None:
+            self._empty = {key: values[:0] for key, values in frames.items()}
+        timestamps = frames["timestamps"]
+        new = np.fromiter((timestamp not in self._seen for timestamp in timestamps.tolist()), dtype=bool, count=len(timestamps))
+        # an event can list the same frame twice
+        _, first = np.unique(timestamps, return_index=True)
+        new &= np.isin(np.arange(len(timestamps)), first)
+        if new.any():
+            self._seen.update(timestamps[new].tolist())
+            self._chunks.append({key: values[new] for key, values in frames.items()})
+        self._event_timestamps.append(timestamps)
+        self._sorted_timestamps = None
+        return len(self._event_timestamps) - 1
+
+    def __len__(self):
+        return len(self._seen)
+
+    def finish(self):
+        """Returns the game's frame table (see frames_to_arrays), ordered by quarter and timestamp."""
+        if not self._chunks:
+            frames = dict(self._empty) if self._empty is not None else frames_to_arrays([])
+        else:
+            frames = {key: np.concatenate([chunk[key] for chunk in self._chunks]) for key in self._chunks[0]}
+            order = np.lexsort((frames["timestamps"], frames["clock"][:, CLOCK_QUARTER]))
+            frames = {key: values[order] for key, values in frames.items()}
+        self._sorted_timestamps = frames["timestamps"]
+        self._order = np.argsort(self._sorted_timestamps, kind="stable")
+        return frames
+
+    def event_range(self, event):
+        """
+        Returns (frame_start, frame_end, frame_index) locating an added event in the finished table.
+        frame_index is empty when the event is exactly rows [frame_start, frame_end), and lists the rows otherwise.
+        """
+        if self._sorted_timestamps is None:
+            self.finish()
+        timestamps = self._event_timestamps[event]
+        if len(timestamps) == 0:
+            return 0, 0, []
+        rows = self._order[np.searchsorted(self._sorted_timestamps, timestamps, sorter=self._order)]
+        start, end = int(rows.min()), int(rows.max()) + 1
+        if np.array_equal(rows, np.arange(start, end)):
+            return start, end, []
+        return start, end, rows.astype(np.int32).tolist()
+
+
+def compact_players(players):
+    """
+    Splits per-frame players (frames, 10, 2) into the distinct lineups of a game (lineups, 10, 2)
+    and an int32 (frames,) index into them; lineups only change on substitutions.
+    """
+    if len(players) == 0:
+        return np.zeros((0, N_PLAYERS, 2), dtype=np.int32), np.zeros(0, dtype=np.int32)
+    lineups, lineup_index = np.unique(players.reshape(len(players), -1), axis=0, return_inverse=True)
+    return lineups.reshape(-1, N_PLAYERS, 2).astype(np.int32), lineup_index.reshape(-1).astype(np.int32)
+
+
+def event_arrays_from_game(frames, frame_start, frame_end, frame_index=None):
+    """
+    This function takes a game frame table, either with per-frame 'players' (finished GameFrameTable) or with
+    'lineups' / 'lineup_index' (a "game" layout example), and an event's frame range.
+    It returns the event's 'positions', 'clock' and 'player_table' as in moments_to_arrays, plus its 'speed' and
+    'direction' when the table has them (built with resampling).
+    """
+    rows = np.asarray(frame_index) if frame_index is not None and len(frame_index) else slice(frame_start, frame_end)
+    if "players" in frames:
+        players = np.asarray(frames["players"])[rows]
+    else:
+        players = np.asarray(frames["lineups"])[np.asarray(frames["lineup_index"])[rows]]
+    positions = np.asarray(frames["positions"])[rows]
+    if "speed" not in frames:
+        positions, player_table = align_players(positions, players)
+        return {"positions": positions, "clock": np.asarray(frames["clock"])[rows], "player_table": player_table}
+
+    # per-slot values move with their player, so they are aligned together as extra trailing columns
+    stacked = np.concatenate([positions, np.asarray(frames["speed"])[rows][..., None], np.asarray(frames["direction"])[rows]], axis=-1)
+    stacked, player_table = align_players(stacked, players)
+    return {
+        "positions": stacked[..., :3],
+        "clock": np.asarray(frames["clock"])[rows],
+        "player_table": player_table,
+        "speed": stacked[..., 3],
+        "direction": stacked[..., 4:],
+    }
+
+
+class GameEvents:
+    """
+    Lazy per-event view over a dataset built with layout="game".
+    Items are event dicts shaped like the "tensor" layout (or the default "moments" layout with as_moments=True);
+    a game's frame table is only decoded (and dequantized, for quantized builds) when one of its events is read.
+
+        games = load_dataset(..., "medium", layout="game")["train"]
+        events = GameEvents(games)
+        events[0]["positions"]
+    """
+
+    _EVENT_FIELDS = ("event_info", "primary_info", "secondary_info")
+    _GAME_FIELDS = ("gameid", "gamedate", "visitor", "home")
+    _FRAME_FIELDS = ("clock", "positions", "lineups", "lineup_index")
+    # only in games built with resampling
+    _KINEMATIC_FIELDS = ("speed", "direction")
+
+    def __init__(self, games, as_moments=False):
+        self.games = games
+        self.as_moments = as_moments
+        # games built with quantize store positions_q / clock_q, decoded when a game is loaded
+        columns = [
+            QUANTIZED_FIELDS[field][0] if field in QUANTIZED_FIELDS and QUANTIZED_FIELDS[field][0] in games.column_names else field
+            for field in self._FRAME_FIELDS
+        ]
+        columns += [field for field in self._KINEMATIC_FIELDS if field in games.column_names]
+        self._frames = games.with_format("numpy", columns=columns)
+        self._game_info = games.select_columns(list(self._GAME_FIELDS))
+        self._events = games["events"]
+        self._offsets = np.cumsum([0] + [len(events) for events in self._events])
+        self._cached_game = None
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def _load_game(self, game):
+        """Returns the (frame arrays, game fields) of a game, kept for the next events of the same game."""
+        if self._cached_game is None or self._cached_game[0] != game:
+            frames = dequantize(dict(self._frames[game]))
+            # events slice views of the table, so a consumer writing into one must not change the others
+            for values in frames.values():
+                values.setflags(write=False)
+            self._cached_game = (game, frames, self._game_info[game])
+        return self._cached_game[1:]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        game = int(np.searchsorted(self._offsets, index, side="right")) - 1
+        meta = self._events[game][index - self._offsets[game]]
+
+        frames, game_fields = self._load_game(game)
+        arrays = event_arrays_from_game(frames, meta["frame_start"], meta["frame_end"], meta["frame_index"])
+        event = {**game_fields, **{field: meta[field] for field in self._EVENT_FIELDS}}
+        if self.as_moments:
+            event["moments"] = arrays_to_moments(
+                arrays["positions"], arrays["clock"], arrays["player_table"], arrays.get("speed"), arrays.get("direction")
+            )
+        else:
+            event.update(arrays)
+        return event
@@ -0,0 +1,230 @@
+"""Spatio-temporal index over the frames of tracking events.
+
+Every frame of every indexed event is a row, and every ball or player position in it a point. Per game:
+  - points are bucketed into a uniform grid of `cell_size` ft cells, so a region query only reads the cells it overlaps
+  - points are also ordered by (entity, row), so the frames of one player (or the ball) are a single slice
+  - rows are ordered by (quarter, game_clock, shot_clock) and by shot_clock, so time windows are binary searches
+Queries combine a region, a proximity test and time windows, and return the (game_id, event_id, frame) hits.
+Games are indexed independently, so adding a game does not touch the others.
+
+    index = TrackingIndex()
+    index.add_events(events)                          # or add_game(game_id, events), one game at a time
+    index.query(entity=BALL, region=PAINT_RIGHT, shot_clock=(None, 5))   # ball in the paint, shot clock under 5
+    index.query(entity=player_id, near=(BALL, 3))     # player within 3 ft of the ball
+
+Regions are (x_min, x_max, y_min, y_max) boxes in the coordinates the events hold, i.e. raw SportVU court
+coordinates for the named regions below, which do not apply to events already passed through normalize_court.
+"""
+
+from itertools import groupby
+
+import numpy as np
+import pandas as pd
+
+from .dataset_operations import LEFT_BASKET_BOX, RIGHT_BASKET_BOX, event_clock, event_xy, in_box
+
+# entity id of the ball; players are their playerid
+BALL = -1
+
+COURT_LENGTH = 94
+COURT_WIDTH = 50
+DEFAULT_CELL_SIZE = 4.0
+
+# 16 ft wide lane from the baseline to the free throw line
+PAINT_LEFT = (0, 19, 17, 33)
+PAINT_RIGHT = (75, 94, 17, 33)
+REGIONS = {
+    "left_basket": LEFT_BASKET_BOX,
+    "right_basket": RIGHT_BASKET_BOX,
+    "left_paint": PAINT_LEFT,
+    "right_paint": PAINT_RIGHT,
+}
+
+HIT_COLUMNS = ["game_id", "event_id", "frame"]
+
+# larger than any game_clock, so one float key orders (quarter, game_clock)
+_QUARTER_SPAN = 1e4
+
+
+def _bounds(window):
+    low, high = window if window is not None else (None, None)
+    return -np.inf if low is None else low, np.inf if high is None else high
+
+
+class _GameIndex:
+    """Index of one game's events; see the module docstring."""
+
+    def __init__(self, events, cell_size):
+        self.cell_size = cell_size
+        self.n_x = int(np.ceil(COURT_LENGTH / cell_size))
+        self.n_y = int(np.ceil(COURT_WIDTH / cell_size))
+
+        event_ids, row_event, row_frame, clocks = [], [], [], []
+        point_row, point_entity, point_xy = [], [], []
+        n_rows = 0
+        for number, event in enumerate(events):
+            xy, player_ids, _ = event_xy(event)
+            n_frames = len(xy)
+            event_ids.append(event["event_info"]["id"])
+            row_event.append(np.full(n_frames, number, dtype=np.int32))
+            row_frame.append(np.arange(n_frames, dtype=np.int32))
+            clocks.append(event_clock(event).reshape(-1, 3))
+            frame, slot = np.nonzero(~np.isnan(xy).any(axis=-1))
+            point_row.append(n_rows + frame)
+            point_entity.append(np.r_[BALL, np.asarray(player_ids, dtype=np.int64)][slot])
+            point_xy.append(xy[frame, slot])
+            n_rows += n_frames
+
+        self.event_ids = event_ids
+        self.row_event = np.concatenate(row_event) if row_event else np.zeros(0, dtype=np.int32)
+        self.row_frame = np.concatenate(row_frame) if row_frame else np.zeros(0, dtype=np.int32)
+        clock = np.concatenate(clocks) if clocks else np.zeros((0, 3))
+        rows = np.concatenate(point_row) if point_row else np.zeros(0, dtype=np.int64)
+        entities = np.concatenate(point_entity) if point_entity else np.zeros(0, dtype=np.int64)
+        xy = np.concatenate(point_xy).astype(np.float32) if point_xy else np.zeros((0, 2), dtype=np.float32)
+
+        # points in cell order; the points of cell c are [cell_start[c], cell_start[c + 1])
+        cells = self._cell(xy[:, 0], self.n_x) * self.n_y + self._cell(xy[:, 1], self.n_y)
+        order = np.argsort(cells, kind="stable")
+        self.point_row, self.point_entity, self.point_xy = rows[order], entities[order], xy[order]
+        self.cell_start = np.searchsorted(cells[order], np.arange(self.n_x * self.n_y + 1))
+
+        # point numbers in (entity, row) order
+        self.entity_order = np.lexsort((self.point_row, self.point_entity))
+        self.entity_sorted = self.point_entity[self.entity_order]
+
+        self.time_order = np.lexsort((clock[:, 2], clock[:, 1], clock[:, 0]))
+        self.time_keys = (clock[:, 0] * _QUARTER_SPAN + clock[:, 1])[self.time_order]
+        self.quarters = np.unique(clock[:, 0])
+        self.shot_order = np.argsort(clock[:, 2], kind="stable")
+        self.shot_sorted = clock[self.shot_order, 2]
+
+    def __len__(self):
+        return len(self.row_event)
+
+    def _cell(self, values, n_cells):
+        return np.clip(np.floor(values / self.cell_size), 0, n_cells - 1).astype(np.int64)
+
+    def _region_points(self, box):
+        x_min, x_max, y_min, y_max = box
+        x_cells = self._cell(np.array([x_min, x_max]), self.n_x)
+        y_cells = self._cell(np.array([y_min, y_max]), self.n_y)
+        # every grid column is a contiguous run of cells
+        first = np.arange(x_cells[0], x_cells[1] + 1) * self.n_y + y_cells[0]
+        starts, ends = self.cell_start[first], self.cell_start[first + y_cells[1] - y_cells[0] + 1]
+        points = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+        xy = self.point_xy[points]
+        return points[in_box(xy[:, 0], xy[:, 1], box)]
+
+    def _entity_points(self, entity):
+        start, end = np.searchsorted(self.entity_sorted, [entity, entity + 1])
+        return self.entity_order[start:end]
+
+    def _entity_xy(self, entity):
+        """Returns float32 (rows, 2) positions of `entity`, NaN in rows where it is absent."""
+        positions = np.full((len(self), 2), np.nan, dtype=np.float32)
+        points = self._entity_points(entity)
+        positions[self.point_row[points]] = self.point_xy[points]
+        return positions
+
+    def spatial_rows(self, entity, region, near):
+        if region is not None:
+            points = self._region_points(region)
+            if entity is not None:
+                points = points[self.point_entity[points] == entity]
+        elif entity is not None:
+            points = self._entity_points(entity)
+        else:
+            points = np.arange(len(self.point_row))
+        if near is not None:
+            target, distance = near
+            if entity is None:
+                points = points[self.point_entity[points] != target]
+            offset = self.point_xy[points] - self._entity_xy(target)[self.point_row[points]]
+            # NaN offsets (target absent) compare False
+            points = points[np.einsum("ij,ij->i", offset, offset) <= distance * distance]
+        return np.unique(self.point_row[points])
+
+    def time_rows(self, quarter, game_clock, shot_clock):
+        rows = None
+        if quarter is not None or game_clock is not None:
+            # game clocks lie in [0, 720], so clipped bounds stay within their quarter's keys
+            low, high = np.clip(_bounds(game_clock), -1, _QUARTER_SPAN / 2)
+            ranges = [
+                (np.searchsorted(self.time_keys, q * _QUARTER_SPAN + low, side="left"),
+                 np.searchsorted(self.time_keys, q * _QUARTER_SPAN + high, side="right"))
+                for q in (self.quarters if quarter is None else [quarter])
+            ]
+            rows = np.sort(np.concatenate([self.time_order[start:end] for start, end in ranges] or [np.zeros(0, dtype=np.int64)]))
+        if shot_clock is not None:
+            low, high = _bounds(shot_clock)
+            start = np.searchsorted(self.shot_sorted, low, side="left")
+            end = np.searchsorted(self.shot_sorted, high, side="right")
+            shot_rows = np.sort(self.shot_order[start:end])
+            rows = shot_rows if rows is None else np.intersect1d(rows, shot_rows, assume_unique=True)
+        return rows
+
+
+class TrackingIndex:
+    """
+    Per-game spatio-temporal index over events in either format ("moments" or "tensor" layout, or GameEvents items).
+    See the module docstring for what is indexed and query for the predicates.
+    """
+
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._games = {}
+
+    def add_game(self, game_id, events):
+        """Indexes (or re-indexes) the events of one game."""
+        self._games[str(game_id)] = _GameIndex(list(events), self.cell_size)
+
+    def add_events(self, events):
+        """Indexes events grouped by game, as in the built dataset; a game seen again is re-indexed."""
+        for game_id, game_events in groupby(events, key=lambda event: str(event["gameid"])):
+            self.add_game(game_id, game_events)
+
+    def remove_game(self, game_id):
+        self._games.pop(str(game_id), None)
+
+    def __contains__(self, game_id):
+        return str(game_id) in self._games
+
+    @property
+    def games(self):
+        return list(self._games)
+
+    def __len__(self):
+        """Returns the number of indexed frames."""
+        return sum(len(game) for game in self._games.values())
+
+    def query(self, entity=None, region=None, near=None, quarter=None, game_clock=None, shot_clock=None, games=None):
+        """
+        This function returns a DataFrame of the (game_id, event_id, frame) hits matching every given predicate:
+          - entity: BALL or a playerid the spatial predicates apply to; None means any entity (other than near's target)
+          - region: (x_min, x_max, y_min, y_max) box or a REGIONS name the entity is inside of
+          - near: (target, distance), the entity is within `distance` ft of entity `target` in the same frame
+          - quarter, game_clock=(low, high), shot_clock=(low, high): time windows, bounds inclusive, None for open ends
+          - games: game ids to search, all indexed games by default
+        With entity but no spatial predicate, the hits are the frames the entity is in.
+        """
+        if isinstance(region, str):
+            region = REGIONS[region]
+        spatial = entity is not None or region is not None or near is not None
+        hits = []
+        for game_id in self._games if games is None else [str(game) for game in games]:
+            game = self._games[game_id]
+            rows = game.time_rows(quarter, game_clock, shot_clock)
+            if spatial:
+                spatial_rows = game.spatial_rows(entity, region, near)
+                rows = spatial_rows if rows is None else np.intersect1d(rows, spatial_rows, assume_unique=True)
+            elif rows is None:
+                rows = np.arange(len(game))
+            hits.append(pd.DataFrame({
+                "game_id": game_id,
+                "event_id": np.asarray(game.event_ids, dtype=object)[game.row_event[rows]],
+                "frame": game.row_frame[rows],
+            }))
+        if not hits:
+            return pd.DataFrame(columns=HIT_COLUMNS)
+        return pd.concat(hits, ignore_index=True)
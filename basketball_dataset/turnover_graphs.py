@@ -0,0 +1,170 @@
+"""Batched graph construction for the turnover GNN.
+
+Every turnover becomes a fully connected directed graph over the players present at its event frame:
+  - node features: x, y, speed, dir_x, dir_y, turnover flag (1 for players of the team that turned the ball over)
+  - edge features: distance between the two players, speed of the source minus speed of the target
+Graphs are built for all turnovers at once and stored as concatenated arrays in the usual batched layout
+(x, edge_index with global node numbers, edge_attr, per-graph node_ptr / edge_ptr offsets and labels y),
+split into .npz shards so training epochs read them back instead of rebuilding them.
+
+    shards = build_graph_shards("turnovers.parquet", "graphs/")
+    for batch in shards:                       # dict of NumPy arrays, one shard at a time
+        ...
+    GraphShards("graphs/").to_torch(batch)     # same dict as torch tensors
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .tracking_arrays import N_PLAYERS
+from .turnover_table import read_turnovers, stack_moments
+
+# bump when the stored arrays change
+GRAPH_FORMAT = 1
+DEFAULT_SHARD_SIZE = 4096
+
+NODE_FEATURES = ("x", "y", "speed", "dir_x", "dir_y", "turnover_flag")
+EDGE_FEATURES = ("distance", "speed_difference")
+
+# every ordered pair of distinct player slots
+_SOURCES, _TARGETS = np.nonzero(~np.eye(N_PLAYERS, dtype=bool))
+
+
+def build_graphs(players, team_ids, event_team, labels=None):
+    """
+    This function takes stacked event moments (see turnover_table.stack_moments):
+    players float (graphs, 10, 6) with x, y, z, speed, dir_x, dir_y, team_ids (graphs, 10) with -1 for empty slots,
+    the team of the turnover per graph and optional labels.
+    It returns a dict of batched arrays:
+      - x: float32 (nodes, 6), NODE_FEATURES of every present player, graph after graph
+      - edge_index: int64 (2, edges), global node numbers
+      - edge_attr: float32 (edges, 2), EDGE_FEATURES
+      - node_ptr / edge_ptr: int64 (graphs + 1,) offsets of each graph's nodes and edges
+      - y: int64 (graphs,), when labels are given
+    Missing speeds and directions (the first frame of an event) are 0.
+    """
+    players = np.asarray(players, dtype=np.float32)
+    team_ids = np.asarray(team_ids)
+    n_graphs = len(players)
+    present = (team_ids != -1) & ~np.isnan(players[..., :2]).any(axis=-1)
+
+    features = np.empty((n_graphs, N_PLAYERS, len(NODE_FEATURES)), dtype=np.float32)
+    features[..., :2] = players[..., :2]
+    features[..., 2:5] = players[..., 3:6]
+    features[..., 5] = team_ids == np.asarray(event_team).reshape(-1, 1)
+    features = np.nan_to_num(features, nan=0.0)
+
+    # slot -> global node number, counting present players only
+    node_number = np.cumsum(present.reshape(-1)).reshape(n_graphs, N_PLAYERS) - 1
+    node_counts = present.sum(axis=1)
+
+    edge_present = present[:, _SOURCES] & present[:, _TARGETS]
+    dx = players[:, _SOURCES, 0] - players[:, _TARGETS, 0]
+    dy = players[:, _SOURCES, 1] - players[:, _TARGETS, 1]
+    speed = features[..., 2]
+    edge_attr = np.stack([np.sqrt(dx * dx + dy * dy), speed[:, _SOURCES] - speed[:, _TARGETS]], axis=-1)
+
+    graphs = {
+        "x": features[present],
+        "edge_index": np.stack([node_number[:, _SOURCES][edge_present], node_number[:, _TARGETS][edge_present]]).astype(np.int64),
+        "edge_attr": edge_attr[edge_present].astype(np.float32),
+        "node_ptr": np.r_[0, np.cumsum(node_counts)].astype(np.int64),
+        "edge_ptr": np.r_[0, np.cumsum(edge_present.sum(axis=1))].astype(np.int64),
+    }
+    if labels is not None:
+        graphs["y"] = np.asarray(labels, dtype=np.int64).reshape(n_graphs)
+    return graphs
+
+
+def select_graphs(graphs, start, end):
+    """Returns graphs [start, end) of a batch from build_graphs, renumbered to start at node 0."""
+    node_start, node_end = graphs["node_ptr"][start], graphs["node_ptr"][end]
+    edge_start, edge_end = graphs["edge_ptr"][start], graphs["edge_ptr"][end]
+    selected = {
+        "x": graphs["x"][node_start:node_end],
+        "edge_index": graphs["edge_index"][:, edge_start:edge_end] - node_start,
+        "edge_attr": graphs["edge_attr"][edge_start:edge_end],
+        "node_ptr": graphs["node_ptr"][start:end + 1] - node_start,
+        "edge_ptr": graphs["edge_ptr"][start:end + 1] - edge_start,
+    }
+    if "y" in graphs:
+        selected["y"] = graphs["y"][start:end]
+    return selected
+
+
+def _fingerprint(path, shard_size):
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{shard_size}:{GRAPH_FORMAT}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def build_graph_shards(table_path, root, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    This function takes a turnover table written by turnover_table.write_turnovers and a shard directory.
+    It builds the graphs of every turnover and writes them as .npz shards of `shard_size` graphs, unless `root`
+    already holds shards built from the same table. It returns the GraphShards view of `root`.
+    """
+    fingerprint = _fingerprint(table_path, shard_size)
+    shards = GraphShards(root)
+    if shards.fingerprint == fingerprint:
+        return shards
+
+    table = read_turnovers(table_path, as_frame=False)
+    moments = stack_moments(table)
+    graphs = build_graphs(moments["players"], moments["team_ids"], table["event_team"], table["made_shot_after"])
+
+    os.makedirs(root, exist_ok=True)
+    n_graphs = len(graphs["node_ptr"]) - 1
+    names = []
+    for shard, start in enumerate(range(0, n_graphs, shard_size)):
+        name = f"graphs-{shard:05d}.npz"
+        np.savez(os.path.join(root, name), **select_graphs(graphs, start, min(start + shard_size, n_graphs)))
+        names.append(name)
+
+    manifest = {"fingerprint": fingerprint, "graphs": n_graphs, "shards": names, "format": GRAPH_FORMAT}
+    tmp_path = os.path.join(root, "manifest.json.tmp")
+    with open(tmp_path, "w") as fp:
+        json.dump(manifest, fp)
+    os.replace(tmp_path, os.path.join(root, "manifest.json"))
+    return GraphShards(root)
+
+
+class GraphShards:
+    """
+    Read-only view of a shard directory written by build_graph_shards.
+    Iterating yields one batch dict (see build_graphs) per shard.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        manifest_path = os.path.join(root, "manifest.json")
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as fp:
+                manifest = json.load(fp)
+        self.fingerprint = manifest.get("fingerprint")
+        self.n_graphs = manifest.get("graphs", 0)
+        self.shards = manifest.get("shards", [])
+
+    def __len__(self):
+        return len(self.shards)
+
+    def load(self, shard):
+        with np.load(os.path.join(self.root, self.shards[shard])) as arrays:
+            return {name: arrays[name] for name in arrays.files}
+
+    def __iter__(self):
+        for shard in range(len(self)):
+            yield self.load(shard)
+
+    @staticmethod
+    def to_torch(graphs):
+        """Converts a batch dict to torch tensors and adds the per-node graph number as 'batch'; needs torch installed."""
+        import torch
+
+        tensors = {name: torch.from_numpy(np.ascontiguousarray(values)) for name, values in graphs.items()}
+        tensors["batch"] = torch.repeat_interleave(torch.arange(len(graphs["node_ptr"]) - 1), torch.from_numpy(np.diff(graphs["node_ptr"])))
+        return tensors
@@ -0,0 +1,139 @@
+"""Outcome labels for turnovers: does the opponent score (or shoot, or draw a foul) within N seconds?
+
+Events are reduced to a table of (game_id, quarter, game_clock, type, possession_team_id) and every lookup is an
+as-of join: the candidate events are sorted once by (game, quarter, team, elapsed time) and each turnover finds
+its next matching event with a binary search, so labeling is O((turnovers + events) log events) instead of
+comparing every turnover with every later event of its game.
+
+    table = events_frame(filter_candidate_events(events))
+    labels = label_turnovers(table, windows=(5, 10), outcomes=("made_shot",))
+    labels["made_shot_within_10"]                  # the old made_shot_after
+"""
+
+import numpy as np
+import pandas as pd
+
+from .dataset_operations import event_clock
+
+# EVENTMSGTYPE values counted as each outcome; possession_team_id is the shooting team for shots and the fouled team for fouls
+OUTCOME_TYPES = {
+    "made_shot": (1,),
+    "shot_attempt": (1, 2),
+    "foul_drawn": (6,),
+}
+TURNOVER_TYPE = 5
+DEFAULT_WINDOW = 10
+
+FRAME_COLUMNS = ["game_id", "quarter", "game_clock", "type", "possession_team_id", "id"]
+
+# larger than any game_clock, so one float key orders (group, elapsed time)
+_GROUP_SPAN = 1e4
+
+
+def events_frame(events):
+    """
+    This function takes an iterable of events in either format and returns a DataFrame with FRAME_COLUMNS.
+    quarter and game_clock come from event_info when filter_candidate_events has set them (the event frame),
+    and from the event's first frame otherwise.
+    """
+    rows = []
+    for event in events:
+        info = event["event_info"]
+        if "game_clock" in info:
+            quarter, game_clock = info["quarter"], info["game_clock"]
+        else:
+            clock = event_clock(event)
+            if len(clock) == 0:
+                continue
+            quarter, game_clock = clock[0, 0], clock[0, 1]
+        rows.append((str(event["gameid"]), quarter, game_clock, info["type"], info["possession_team_id"], info["id"]))
+    frame = pd.DataFrame(rows, columns=FRAME_COLUMNS)
+    return frame.astype({"quarter": np.int64, "game_clock": np.float64, "type": np.int64, "possession_team_id": np.float64})
+
+
+def _opponents(table):
+    """Returns, per row, the other team of the row's game (NaN when the game has fewer or more than two teams)."""
+    teams = table.dropna(subset=["possession_team_id"]).groupby("game_id")["possession_team_id"].unique()
+    pairs = teams[teams.map(len) == 2]
+    team_sum = table["game_id"].map(pairs.map(sum))
+    return team_sum - table["possession_team_id"]
+
+
+def time_to_next(queries, candidates, team_column, strictly_after=False):
+    """
+    This function takes query rows and candidate rows (DataFrames with game_id, quarter, game_clock, possession_team_id)
+    and the query column holding the team to look for.
+    It returns, per query, the seconds until the next candidate of that team in the same game and quarter
+    (inf when there is none); with strictly_after, candidates at the query's own game_clock are not counted.
+    """
+    groups = pd.concat([
+        candidates[["game_id", "quarter", "possession_team_id"]],
+        queries[["game_id", "quarter", team_column]].set_axis(["game_id", "quarter", "possession_team_id"], axis=1),
+    ])
+    codes, _ = pd.MultiIndex.from_frame(groups.astype({"possession_team_id": np.float64})).factorize()
+    candidate_codes, query_codes = codes[:len(candidates)], codes[len(candidates):]
+
+    # game_clock counts down, so -game_clock orders events by elapsed time within a group
+    candidate_keys = np.sort(candidate_codes * _GROUP_SPAN - candidates["game_clock"].to_numpy(dtype=np.float64))
+    query_keys = query_codes * _GROUP_SPAN - queries["game_clock"].to_numpy(dtype=np.float64)
+
+    position = np.searchsorted(candidate_keys, query_keys, side="right" if strictly_after else "left")
+    found = position < len(candidate_keys)
+    next_keys = candidate_keys[np.minimum(position, len(candidate_keys) - 1)]
+    seconds = next_keys - query_keys
+    valid = found & (seconds < _GROUP_SPAN / 2) & queries[team_column].notna().to_numpy()
+    return np.where(valid, seconds, np.inf)
+
+
+def label_turnovers(table, windows=(DEFAULT_WINDOW,), outcomes=("made_shot",), possession_change=True):
+    """
+    This function takes an events table (see events_frame) holding the turnovers and the events they are checked against.
+    It returns one row per turnover with its game_id / id, and for every outcome name in `outcomes` (see OUTCOME_TYPES):
+      - seconds_to_{outcome}: seconds until the opponent's next such event in the same quarter (inf when there is none)
+      - {outcome}_within_{N}: whether that happens within N seconds, for every N in `windows`
+    With possession_change, an outcome only counts when it comes before the turnover team's next event,
+    i.e. before the ball has gone back to the team that lost it.
+    """
+    table = table.reset_index(drop=True)
+    table = table.assign(opponent_team_id=_opponents(table))
+    turnovers = table[table["type"] == TURNOVER_TYPE]
+
+    labels = turnovers[["game_id", "id", "quarter", "game_clock", "possession_team_id"]].reset_index(drop=True)
+    regained = np.inf
+    if possession_change:
+        regained = time_to_next(turnovers, table, "possession_team_id", strictly_after=True)
+
+    for outcome in outcomes:
+        candidates = table[table["type"].isin(OUTCOME_TYPES[outcome])]
+        seconds = time_to_next(turnovers, candidates, "opponent_team_id")
+        seconds = np.where(seconds <= regained, seconds, np.inf)
+        labels[f"seconds_to_{outcome}"] = seconds
+        for window in windows:
+            labels[f"{outcome}_within_{window:g}"] = seconds <= window
+    return labels
+
+
+def label_events(events, table=None, windows=(DEFAULT_WINDOW,), outcomes=("made_shot",), possession_change=True):
+    """
+    This function takes processed events (filter_candidate_events output) and writes the labels of label_turnovers into
+    the event_info of each turnover, plus made_shot_after (made shot within DEFAULT_WINDOW) when that label is computed.
+    `table` is the events table to check against, by default events_frame(events).
+    Operates in-place and returns the events.
+    """
+    if table is None:
+        table = events_frame(events)
+    labels = label_turnovers(table, windows, outcomes, possession_change)
+    label_columns = [column for column in labels.columns if column.startswith("seconds_to_") or "_within_" in column]
+    by_event = {
+        (game_id, event_id): values
+        for game_id, event_id, values in zip(labels["game_id"], labels["id"], labels[label_columns].to_dict("records"))
+    }
+    default_label = f"made_shot_within_{DEFAULT_WINDOW:g}"
+    for event in events:
+        values = by_event.get((str(event["gameid"]), event["event_info"]["id"]))
+        if values is None:
+            continue
+        event["event_info"].update({column: value.item() if hasattr(value, "item") else value for column, value in values.items()})
+        if default_label in values:
+            event["event_info"]["made_shot_after"] = bool(values[default_label])
+    return events
@@ -0,0 +1,215 @@
+"""Typed columnar table of turnover events.
+
+One row per turnover from filter_candidate_events, stored as Parquet with fixed-width columns:
+event metadata with proper dtypes, the ball and the ten players at the event frame
+(ball_{field} and player{slot}_{field}, float32 positions and kinematics, int64 ids; NaN / -1 for empty slots)
+and the made_shot_after label.
+
+    write_turnovers(filter_candidate_events(events), "turnovers.parquet")
+    table = read_turnovers("turnovers.parquet")             # pandas DataFrame
+    arrays = read_turnovers("turnovers.parquet", as_frame=False)
+    moments = stack_moments(arrays)                        # ball (n, 6), players (n, 10, 6), ids (n, 10)
+"""
+
+import ast
+import re
+
+import numpy as np
+
+from .dataset_operations import event_moment
+from .tracking_arrays import N_PLAYERS
+
+# per-entity values at the event frame, in column order
+MOMENT_FIELDS = ("x", "y", "z", "speed", "dir_x", "dir_y")
+
+# metadata columns and their NumPy dtypes ('str' columns are stored as Parquet strings)
+METADATA_COLUMNS = {
+    "id": np.int32,
+    "type": np.int8,
+    "possession_team_id": np.int64,
+    "desc_home": str,
+    "desc_away": str,
+    "direction": str,
+    "quarter": np.int8,
+    "game_clock": np.float32,
+    "shot_clock": np.float32,
+    "event_type": str,
+    "game_id": str,
+    "event_frame": np.int32,
+    "event_team": np.int64,
+}
+
+
+def _player_columns():
+    columns = {}
+    for slot in range(N_PLAYERS):
+        columns[f"player{slot}_teamid"] = np.int64
+        columns[f"player{slot}_playerid"] = np.int64
+        columns.update({f"player{slot}_{field}": np.float32 for field in MOMENT_FIELDS})
+    return columns
+
+
+COLUMNS = {
+    **METADATA_COLUMNS,
+    **{f"ball_{field}": np.float32 for field in MOMENT_FIELDS},
+    **_player_columns(),
+    "made_shot_after": np.bool_,
+}
+
+
+def _moment_values(event):
+    """Returns (ball (6,), players (10, 6), ids (10, 2) teamid / playerid) at the event frame of an event in either format."""
+    moment = event_moment(event)
+    ball = np.full(len(MOMENT_FIELDS), np.nan)
+    players = np.full((N_PLAYERS, len(MOMENT_FIELDS)), np.nan)
+    ids = np.full((N_PLAYERS, 2), -1, dtype=np.int64)
+
+    if "positions" not in moment:
+        entries = [moment["ball_coordinates"], *moment["player_coordinates"][:N_PLAYERS]]
+        values = np.array([[entry.get(field, np.nan) for field in MOMENT_FIELDS] for entry in entries], dtype=np.float64)
+        ball[:] = values[0]
+        players[:len(entries) - 1] = values[1:]
+        ids[:len(entries) - 1] = [(entry["teamid"], entry["playerid"]) for entry in entries[1:]]
+        return ball, players, ids
+
+    frame = event["event_info"]["event_frame"]
+    values = np.full((N_PLAYERS + 1, len(MOMENT_FIELDS)), np.nan)
+    values[:, :3] = moment["positions"]
+    kinematics = event.get("kinematics")
+    if kinematics is not None:
+        values[:, 3] = kinematics["speed"][frame]
+        values[:, 4:] = kinematics["direction"][frame]
+    ball[:] = values[0]
+    players[:] = values[1:]
+    ids[:] = moment["player_table"][:, ::-1]
+    return ball, players, ids
+
+
+def turnover_columns(events, made_shot_after=None):
+    """
+    This function takes processed turnover events (filter_candidate_events output; other event types are skipped)
+    and optional made_shot_after labels, one per turnover, defaulting to event_info['made_shot_after'] (False when missing).
+    It returns a dict of NumPy columns as described by COLUMNS.
+    """
+    metadata = {column: [] for column in METADATA_COLUMNS}
+    balls, players, ids, labels = [], [], [], []
+    for event in events:
+        info = event["event_info"]
+        if info.get("event_type") != "turnover":
+            continue
+        for column in METADATA_COLUMNS:
+            if column == "event_team":
+                metadata[column].append(event["primary_info"]["team_id"])
+            elif column == "game_id":
+                metadata[column].append(str(info["game_id"]))
+            else:
+                metadata[column].append(info[column])
+        ball, player_values, player_ids = _moment_values(event)
+        balls.append(ball)
+        players.append(player_values)
+        ids.append(player_ids)
+        labels.append(bool(info.get("made_shot_after", False)))
+
+    n_rows = len(balls)
+    if made_shot_after is not None:
+        labels = made_shot_after
+    balls = np.array(balls, dtype=np.float32).reshape(n_rows, len(MOMENT_FIELDS))
+    players = np.array(players, dtype=np.float32).reshape(n_rows, N_PLAYERS, len(MOMENT_FIELDS))
+    ids = np.array(ids, dtype=np.int64).reshape(n_rows, N_PLAYERS, 2)
+    return _columns(metadata, balls, players, ids, labels)
+
+
+def _columns(metadata, balls, players, ids, labels):
+    columns = {}
+    for column, dtype in METADATA_COLUMNS.items():
+        values = metadata[column]
+        columns[column] = np.array(values, dtype=object) if dtype is str else np.asarray(values, dtype=np.float64).astype(dtype)
+    for index, field in enumerate(MOMENT_FIELDS):
+        columns[f"ball_{field}"] = balls[:, index]
+    for slot in range(N_PLAYERS):
+        columns[f"player{slot}_teamid"] = ids[:, slot, 0]
+        columns[f"player{slot}_playerid"] = ids[:, slot, 1]
+        for index, field in enumerate(MOMENT_FIELDS):
+            columns[f"player{slot}_{field}"] = players[:, slot, index]
+    columns["made_shot_after"] = np.asarray(labels, dtype=np.bool_).reshape(len(balls))
+    return columns
+
+
+def write_table(columns, path):
+    """Writes a dict of columns (see COLUMNS) to Parquet at `path`."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrays = {
+        column: pa.array(values.tolist(), type=pa.string()) if COLUMNS[column] is str else pa.array(values)
+        for column, values in columns.items()
+    }
+    pq.write_table(pa.table(arrays), path)
+
+
+def write_turnovers(events, path, made_shot_after=None):
+    """Writes the turnover table of processed events (see turnover_columns) to Parquet and returns the number of rows."""
+    columns = turnover_columns(events, made_shot_after)
+    write_table(columns, path)
+    return len(columns["id"])
+
+
+def read_turnovers(path, as_frame=True, columns=None):
+    """
+    Reads a turnover table written by write_turnovers.
+    Returns a pandas DataFrame, or with as_frame=False a dict of NumPy arrays (strings as object arrays).
+    """
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path, columns=columns)
+    if as_frame:
+        return table.to_pandas()
+    return {name: table.column(name).to_numpy() for name in table.column_names}
+
+
+def stack_moments(columns):
+    """
+    This function takes a turnover table (DataFrame or dict of arrays) and returns its event moments as stacked arrays:
+      - ball: float32 (rows, 6)
+      - players: float32 (rows, 10, 6), fields in MOMENT_FIELDS order
+      - team_ids, player_ids: int64 (rows, 10), -1 for empty slots
+    """
+    def column(name):
+        return np.asarray(columns[name])
+
+    ball = np.stack([column(f"ball_{field}") for field in MOMENT_FIELDS], axis=-1).astype(np.float32)
+    players = np.stack([
+        np.stack([column(f"player{slot}_{field}") for field in MOMENT_FIELDS], axis=-1) for slot in range(N_PLAYERS)
+    ], axis=1).astype(np.float32)
+    team_ids = np.stack([column(f"player{slot}_teamid") for slot in range(N_PLAYERS)], axis=1).astype(np.int64)
+    player_ids = np.stack([column(f"player{slot}_playerid") for slot in range(N_PLAYERS)], axis=1).astype(np.int64)
+    return {"ball": ball, "players": players, "team_ids": team_ids, "player_ids": player_ids}
+
+
+_NP_SCALAR_PATTERN = re.compile(r"np\.\w+\(([^()]*)\)")
+_NAN_PATTERN = re.compile(r"\bnan\b")
+
+
+def convert_legacy_csv(csv_path, path):
+    """
+    Converts a turnovers.csv written from the flattened event_info (event_moment.* columns, player coordinates as
+    a Python repr string) to the typed table at `path`. event_frame is not in the CSV and is stored as -1.
+    Returns the number of rows.
+    """
+    import pandas as pd
+
+    legacy = pd.read_csv(csv_path, dtype={"game_id": str, "desc_home": str, "desc_away": str})
+    metadata = {column: legacy[column].tolist() for column in METADATA_COLUMNS if column in legacy}
+    metadata["event_frame"] = [-1] * len(legacy)
+
+    ball = np.stack([legacy[f"event_moment.ball_coordinates.{field}"].to_numpy(dtype=np.float64) for field in MOMENT_FIELDS], axis=-1)
+    players = np.full((len(legacy), N_PLAYERS, len(MOMENT_FIELDS)), np.nan)
+    ids = np.full((len(legacy), N_PLAYERS, 2), -1, dtype=np.int64)
+    for row, text in enumerate(legacy["event_moment.player_coordinates"].tolist()):
+        entries = ast.literal_eval(_NAN_PATTERN.sub("None", _NP_SCALAR_PATTERN.sub(r"\1", text)))[:N_PLAYERS]
+        players[row, :len(entries)] = np.array([[entry.get(field) for field in MOMENT_FIELDS] for entry in entries], dtype=np.float64)
+        ids[row, :len(entries)] = [(entry["teamid"], entry["playerid"]) for entry in entries]
+
+    columns = _columns(metadata, ball.astype(np.float32), players.astype(np.float32), ids, legacy["made_shot_after"].to_numpy())
+    write_table(columns, path)
+    return len(legacy)